@@ -0,0 +1,24 @@
+"""
+Per-user application directories
+"""
+
+import os
+import sys
+
+APP_NAME = "LocalLLMEbookTranslator"
+
+
+def user_cache_dir(*parts) -> str:
+    """Per-user cache directory (created on demand), e.g. user_cache_dir('parse')"""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Local")
+        root = os.path.join(base, APP_NAME, "Cache")
+    elif sys.platform == "darwin":
+        root = os.path.join(os.path.expanduser("~"), "Library", "Caches", APP_NAME)
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        root = os.path.join(base, APP_NAME)
+
+    path = os.path.join(root, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -3,20 +3,211 @@ Async Ebook Translator v2 - 최적화된 고성능 번역 엔진
 - 커넥션 풀 재활용
 - 단일 이벤트 루프
 - as_completed()로 빠른 결과 수집
+- 파싱 스트림을 바로 소비해 파싱과 추론을 겹쳐 실행
+- 동일 청크는 한 번만 요청하고 결과를 모든 위치에 배포
+- 숫자/URL/코드 등 번역이 필요 없는 청크는 LLM 호출 없이 그대로 통과
+- SQLite 번역 메모리로 이전 번역 재사용
+- 완료된 청크를 저널에 기록해 중단된 작업을 이어서 번역
+- 스트리밍 응답으로 토큰 단위 진행률, 첫 토큰 지연(TTFT) 측정, 생성 중 취소
+- 관측한 지연/처리량에 따라 동시 요청 수를 실행 중에 조절 (AIMD)
+- 여러 Ollama 서버에 부하 분산 (가중치, 헬스 체크, 서버별 처리량)
+- 읽기 순서 창(window) 안에서만 앞서 나가고, 앞에서부터 끝난 결과를 바로 sink로 내보냄
+- 청크마다 태스크를 만들지 않고 고정된 수의 워커가 제한된 큐에서 꺼내 처리
+- /api/chat 고정 시스템 프롬프트로 서버의 프롬프트 접두사(KV 캐시) 재사용, keep_alive로 모델 상주
+- 짧은 청크 여러 개를 번호 구분자로 묶어 요청 1건으로 번역 (구분자가 안 맞으면 개별 요청)
+- 이번 실행의 지연 분위수를 넘긴 요청은 다른 서버/슬롯으로 복제해 먼저 끝난 쪽을 사용 (헤지 요청)
+- 원인별 재시도 (4xx는 재시도 안 함), 지터를 준 지수 백오프, 작업당 재시도 예산,
+  모든 서버가 응답하지 않으면 복구될 때까지 요청을 멈추는 서킷 브레이커
+- 출력 토큰 상한/생성 시간 제한을 입력 길이와 목표 언어 확장 비율로 정하고, 반복 생성은 스트리밍 중에 끊고 재시도
+- 작업이 설정되면 파싱과 동시에 모델을 미리 올리고, 로딩 시간은 번역 시간과 따로 보고
+- 추론 서버 백엔드 선택: Ollama 또는 OpenAI 호환 서버 (llama.cpp server, vLLM, TGI)
 """
 
 import asyncio
+import hashlib
 import httpx
 import os
-from typing import List, Tuple, Dict, Optional, Callable, Any
-from dataclasses import dataclass, field
-import ebooklib
-from ebooklib import epub
+import re
+import sqlite3
+import time
+from typing import List, Tuple, Dict, Optional, Callable, Any, Iterable, AsyncIterable, AsyncIterator, Union, Set
+from dataclasses import dataclass, field, replace
 from bs4 import BeautifulSoup
+from ebook_parser import apply_block_translations, block_plain_text, split_chunk_id, estimate_tokens
+from epub_zip import ZipEpub
+from chunk_filters import PASSTHROUGH_RULES, passthrough_rule
+from translation_memory import TranslationMemory, DEFAULT_MAX_ENTRIES, DEFAULT_MAX_AGE_DAYS
+from translation_journal import TranslationJournal
+from concurrency import AdaptiveLimiter, HedgePolicy
+from endpoints import (EndpointPool, CircuitOpenError, DEFAULT_PROBE_INTERVAL, DEFAULT_FAILURE_THRESHOLD,
+                       DEFAULT_OPEN_TIMEOUT)
+from retry_policy import (TIMEOUT, CONNECTION, GENERATION, RetryBudget, backoff_delay, classify_error,
+                          counts_against_server, is_retryable)
+from backends import Backend, Generation, make_backend
+from generation_limits import (RepetitionDetector, RunawayGenerationError, expansion_ratio, output_token_limit,
+                               time_limit)
 from concurrent.futures import ThreadPoolExecutor
 import threading
 
 
+# 프롬프트 문구를 바꾸면 올려서 번역 메모리의 이전 결과를 무효화
+PROMPT_TEMPLATE_VERSION = 2
+# 요청 방식: chat은 지시문을 고정 시스템 메시지로 보내 청크마다 같은 접두사를 재사용
+APIS = ('chat', 'generate')
+
+# 묶음 요청: 각 청크 앞에 [[번호]]를 붙이고, 응답도 같은 구분자로 다시 나눔
+BATCH_INSTRUCTIONS = ("The text consists of numbered segments, each starting with a marker such as [[1]] on its own line. "
+                      "Translate each segment separately and repeat its marker unchanged on its own line before "
+                      "the translation, keeping the original order.")
+_BATCH_MARKER_RE = re.compile(r'^[ \t]*\[\[(\d+)\]\][ \t]*$', re.MULTILINE)
+# 블록 모드: 링크, 강조, 줄바꿈은 <1>...</1>, <2/> 같은 번호 태그로 원문에 들어 있음 (ebook_parser.extract_blocks)
+MARKUP_INSTRUCTIONS = ("Keep tags such as <1>, </1> and <2/> unchanged, placed around or at the words they "
+                       "mark in the translation.")
+
+
+def _join_batch(texts: List[str]) -> str:
+    return "\n\n".join(f"[[{number}]]\n{text.strip()}" for number, text in enumerate(texts, 1))
+
+
+def _split_batch(text: str, count: int) -> Optional[List[str]]:
+    """묶음 응답을 청크별 번역으로 나눔; 구분자가 1..count 순서와 다르거나 빈 번역이 있으면 None"""
+    pieces = _BATCH_MARKER_RE.split(text)
+    # [마커 앞 텍스트, 번호1, 번역1, 번호2, 번역2, ...]
+    numbers, parts = pieces[1::2], [piece.strip() for piece in pieces[2::2]]
+    if pieces[0].strip() or numbers != [str(number) for number in range(1, count + 1)] or not all(parts):
+        return None
+    return parts
+
+Chunk = Tuple[Any, str]  # (챕터 ID, 텍스트)
+ChunkSource = Union[Iterable[Chunk], AsyncIterable[Chunk]]
+# (읽기 순서 인덱스, 챕터 ID, 번역 결과 또는 실패 시 None)
+ChunkSink = Callable[[int, Any, Optional[str]], Any]
+
+
+async def _aiter_chunks(chapters: ChunkSource) -> AsyncIterator[Chunk]:
+    """리스트, 동기 제너레이터, 비동기 제너레이터를 하나의 비동기 스트림으로 통일"""
+    if hasattr(chapters, '__aiter__'):
+        async for chunk in chapters:
+            yield chunk
+        return
+    
+    if isinstance(chapters, (list, tuple)):
+        for chunk in chapters:
+            yield chunk
+        return
+    
+    # 동기 제너레이터(파서)는 블로킹이므로 스레드에서 한 칸씩 진행
+    loop = asyncio.get_running_loop()
+    iterator = iter(chapters)
+    done = object()
+    while True:
+        chunk = await loop.run_in_executor(None, next, iterator, done)
+        if chunk is done:
+            break
+        yield chunk
+
+
+def _dedup_key(text: str) -> bytes:
+    """공백 차이를 무시한 청크 식별 키 (원문 대신 다이제스트만 보관)"""
+    return hashlib.blake2b(" ".join(text.split()).encode('utf-8'), digest_size=16).digest()
+
+
+@dataclass
+class _ChunkJob:
+    """추론 요청 1건 - 동일한 청크의 모든 위치가 공유"""
+    content: str
+    positions: List[Tuple[int, Any]] = field(default_factory=list)  # (인덱스, 챕터 ID)
+    result: str = ""
+    error: Optional[BaseException] = None
+    done: bool = False
+    key: bytes = b""  # _dedup_key(content)
+
+
+@dataclass
+class TranslationStats:
+    """작업 요약 통계"""
+    chunks: int = 0  # 입력 청크 수
+    requests: int = 0  # 실제 LLM 서버 요청 수
+    deduplicated: int = 0  # 중복으로 합쳐진 청크 수
+    passthrough: int = 0  # 번역 불필요로 판정되어 생략된 요청 수
+    passthrough_by_rule: Dict[str, int] = field(default_factory=dict)
+    memory_hits: int = 0  # 번역 메모리에서 재사용한 요청 수
+    memory_misses: int = 0  # 번역 메모리에 없어 서버에 요청한 수 (메모리를 쓸 때만)
+    resumed: int = 0  # 저널에서 이어받은 청크 수
+    failed: int = 0
+    tokens: int = 0  # 스트리밍으로 받은 생성 토큰 수
+    ttft_total: float = 0.0  # 첫 토큰까지 걸린 시간 합계 (초)
+    ttft_max: float = 0.0
+    ttft_count: int = 0
+    concurrency: int = 0  # 작업이 끝날 때의 동시 요청 수
+    concurrency_adjustments: int = 0
+    endpoint_report: List[str] = field(default_factory=list)  # 서버별 요청/토큰/처리량 (서버가 여럿일 때)
+    # 서버가 보고한 프롬프트 평가량 (접두사 캐시가 재사용되면 요청당 값이 줄어듦)
+    prompt_eval_tokens: int = 0
+    prompt_eval_seconds: float = 0.0
+    prompt_eval_requests: int = 0
+    batches: int = 0  # 묶음 요청 수
+    batched_chunks: int = 0  # 묶음 요청으로 번역된 청크 수
+    batch_fallbacks: int = 0  # 구분자가 맞지 않아 개별 요청으로 다시 번역한 묶음 수
+    hedged: int = 0  # 느린 요청을 복제해 보낸 수
+    hedge_wins: int = 0  # 복제 요청이 먼저 끝난 수
+    retries: int = 0
+    retries_by_cause: Dict[str, int] = field(default_factory=dict)  # retry_policy의 원인별
+    circuit_opens: int = 0  # 모든 서버가 응답하지 않아 요청을 멈춘 횟수
+    load_seconds: float = 0.0  # 모델 로딩 시간 (미리 올리기, 서버가 여럿이면 가장 오래 걸린 서버)
+    elapsed: float = 0.0  # 번역 시간 (모델 로딩 대기 제외, 초)
+    
+    def record_generation(self, generation: "Generation"):
+        if generation.prompt_eval_count or generation.prompt_eval_duration:
+            self.prompt_eval_tokens += generation.prompt_eval_count
+            self.prompt_eval_seconds += generation.prompt_eval_duration
+            self.prompt_eval_requests += 1
+    
+    @property
+    def ttft_avg(self) -> float:
+        return self.ttft_total / self.ttft_count if self.ttft_count else 0.0
+    
+    def record_ttft(self, seconds: float):
+        self.ttft_total += seconds
+        self.ttft_max = max(self.ttft_max, seconds)
+        self.ttft_count += 1
+    
+    @property
+    def dedup_ratio(self) -> float:
+        return self.deduplicated / self.chunks if self.chunks else 0.0
+    
+    @property
+    def memory_hit_ratio(self) -> float:
+        lookups = self.memory_hits + self.memory_misses
+        return self.memory_hits / lookups if lookups else 0.0
+    
+    def summary(self) -> str:
+        rules = ", ".join(f"{name} {count}" for name, count in self.passthrough_by_rule.items())
+        return (f"청크 {self.chunks}개, 추론 요청 {self.requests}개, "
+                f"중복 제거 {self.deduplicated}개 ({self.dedup_ratio:.1%}), "
+                f"원문 통과 {self.passthrough}개{f' ({rules})' if rules else ''}, "
+                f"번역 메모리 적중 {self.memory_hits}개"
+                + (f" (미적중 {self.memory_misses}개, 적중률 {self.memory_hit_ratio:.1%})"
+                   if self.memory_hits + self.memory_misses else "")
+                + f", 이어받음 {self.resumed}개, 실패 {self.failed}개"
+                + (f", 생성 토큰 {self.tokens}개, 첫 토큰 평균 {self.ttft_avg:.2f}초 (최대 {self.ttft_max:.2f}초)"
+                   if self.ttft_count else "")
+                + (f", 동시 요청 수 {self.concurrency} (조정 {self.concurrency_adjustments}회)"
+                   if self.concurrency else "")
+                + (f", 프롬프트 평가 요청당 {self.prompt_eval_tokens / self.prompt_eval_requests:.0f}토큰 "
+                   f"{self.prompt_eval_seconds / self.prompt_eval_requests * 1000:.0f}ms"
+                   if self.prompt_eval_requests else "")
+                + (f", 묶음 요청 {self.batches}개 (청크 {self.batched_chunks}개, 개별 재요청 {self.batch_fallbacks}개)"
+                   if self.batches else "")
+                + (f", 헤지 요청 {self.hedged}개 (먼저 끝남 {self.hedge_wins}개)" if self.hedged else "")
+                + (f", 재시도 {self.retries}개 ("
+                   + ", ".join(f"{cause} {count}" for cause, count in self.retries_by_cause.items()) + ")"
+                   if self.retries else "")
+                + (f", 서버 응답 없음으로 중단 {self.circuit_opens}회" if self.circuit_opens else "")
+                + (f", 모델 로딩 {self.load_seconds:.1f}초" if self.load_seconds else "")
+                + (f", 번역 {self.elapsed:.1f}초" if self.elapsed else ""))
+
+
 @dataclass
 class TranslationConfig:
     """번역 설정"""
@@ -24,10 +215,79 @@ class TranslationConfig:
     target_language: str = "한국어"
     source_language: Optional[str] = None
     base_url: str = "http://localhost:11434"
-    max_concurrent: int = 5  # 동시 요청 수
+    # 추론 서버 종류 (backends.BACKENDS): 'ollama' 또는 OpenAI 호환 서버 'openai' (llama.cpp server, vLLM, TGI 등)
+    backend: str = 'ollama'
+    api_key: Optional[str] = None  # OpenAI 호환 서버의 Bearer 토큰
+    # 여러 서버에 분산: (URL, 서버별 동시 요청 수) 목록; 비어 있으면 base_url 하나만 사용
+    endpoints: Tuple[Tuple[str, int], ...] = ()
+    probe_interval: float = DEFAULT_PROBE_INTERVAL  # 제외된 서버 헬스 체크 간격 (초)
+    failure_threshold: int = DEFAULT_FAILURE_THRESHOLD  # 연속 실패 몇 번이면 서버를 제외할지
+    # 모든 서버가 제외되면 요청은 헬스 체크가 성공할 때까지 최대 이만큼 기다린 뒤 실패 (초)
+    circuit_open_timeout: float = DEFAULT_OPEN_TIMEOUT
+    # 읽기 순서 창: 아직 내보내지 않은 가장 앞 청크보다 이만큼 앞서서는 청크를 받지 않음 (0이면 제한 없음)
+    reorder_window: int = 0
+    # 워커당 대기열 길이: 큐가 차면 파서 스트림을 더 읽지 않음
+    queue_depth_per_worker: int = 4
+    max_concurrent: int = 5  # 동시 요청 수 (적응형이면 시작값)
+    # 적응형 동시성: 지연/처리량을 보고 min_concurrent..max_concurrent_limit 사이에서 조절
+    adaptive_concurrency: bool = True
+    min_concurrent: int = 1
+    max_concurrent_limit: int = 16
     timeout: float = 120.0  # 요청 타임아웃 (초)
-    max_retries: int = 3  # 재시도 횟수
+    max_retries: int = 3  # 요청당 시도 횟수 (4xx 오류는 재시도하지 않음)
+    # 재시도 간격: 0..min(retry_backoff_max, retry_backoff_base * 2^시도) 사이 임의 값
+    retry_backoff_base: float = 0.5
+    retry_backoff_max: float = 10.0
+    # 작업당 재시도 예산: retry_budget_min + 요청 수 * retry_budget_ratio개까지
+    retry_budget_ratio: float = 0.1
+    retry_budget_min: int = 10
     connection_pool_size: int = 10  # 커넥션 풀 크기
+    # 스트리밍 응답: 첫 토큰은 timeout까지, 이후 토큰 사이 간격은 stall_timeout까지 기다림
+    stream: bool = True
+    stall_timeout: float = 30.0
+    # 요청 방식 (APIS)과 모델 상주 시간 (Ollama 형식: "30m", 초 단위 숫자, -1은 계속 상주; OpenAI 호환 서버는 무시)
+    api: str = 'chat'
+    keep_alive: Optional[Union[str, int]] = "30m"
+    unload_after_job: bool = False  # 작업이 끝나면 keep_alive=0으로 모델을 내려 VRAM 반환
+    # 작업 시작 시 (start_warm_up을 먼저 부르지 않았으면) 모델을 미리 올리고, 로딩이 끝난 뒤 요청 시작
+    warm_up: bool = True
+    # 출력 토큰 상한(num_predict): 입력 추정 토큰 * 확장 비율 * num_predict_margin을 num_predict_min..num_predict_max로
+    # (output_token_ratio가 None이면 목표 언어별 비율; 상한에서 끊긴 응답은 num_predict_max로 다시 요청)
+    output_token_ratio: Optional[float] = None
+    num_predict_margin: float = 2.0
+    num_predict_min: int = 128
+    num_predict_max: int = 2048
+    # 첫 토큰 이후 생성 시간 제한: 출력 토큰 상한 * seconds_per_output_token을 timeout_min..timeout으로
+    seconds_per_output_token: float = 0.1
+    timeout_min: float = 30.0
+    # 반복 생성 감지: 최근 repetition_window개 n-gram(토큰 repetition_ngram개) 중 하나가 repetition_max_repeats번
+    # 나오면 중단하고 repeat_penalty를 retry_repeat_penalty로 올려 재시도
+    detect_repetition: bool = True
+    repetition_ngram: int = 4
+    repetition_window: int = 256
+    repetition_max_repeats: int = 8
+    retry_repeat_penalty: float = 1.3
+    # 짧은 청크 묶음 요청: 추정 토큰이 batch_max_chunk_tokens 이하인 청크를
+    # 최대 batch_max_size개, 합계 batch_max_tokens까지 한 요청으로 번역
+    batch_short_chunks: bool = False
+    batch_max_chunk_tokens: int = 48
+    batch_max_size: int = 8
+    batch_max_tokens: int = 256
+    # 헤지 요청: 이번 실행에서 관측한 (입력 토큰당) 지연의 hedge_percentile 분위수를 넘긴 요청을
+    # 한 번 더 보내 먼저 끝난 쪽을 사용; 요청이 hedge_min_samples개 끝난 뒤부터, 복제는 요청 수의 hedge_max_ratio까지
+    hedge_requests: bool = False
+    hedge_percentile: float = 0.95
+    hedge_min_samples: int = 20
+    hedge_min_delay: float = 2.0  # 이보다 빨리는 복제하지 않음 (초)
+    hedge_max_ratio: float = 0.1
+    # LLM 없이 원문 그대로 통과시킬 규칙 (chunk_filters.PASSTHROUGH_RULES 이름)
+    passthrough_rules: Tuple[str, ...] = tuple(PASSTHROUGH_RULES)
+    # 번역 메모리 (SQLite); 경로가 None이면 사용자 캐시 폴더
+    translation_memory: bool = True
+    translation_memory_path: Optional[str] = None
+    translation_memory_compress: bool = True
+    translation_memory_max_entries: int = DEFAULT_MAX_ENTRIES
+    translation_memory_max_age_days: float = DEFAULT_MAX_AGE_DAYS
 
 
 class AsyncEbookTranslator:
@@ -35,34 +295,181 @@ class AsyncEbookTranslator:
     
     def __init__(self, config: Optional[TranslationConfig] = None):
         self.config = config or TranslationConfig()
-        self._client: Optional[httpx.AsyncClient] = None
+        self.backend: Backend = make_backend(self.config.backend, self.config.model_name, self.config.keep_alive)
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._pool: Optional[EndpointPool] = None
         self.last_parsed_file: Optional[str] = None
+        self.last_stats = TranslationStats()
+        self._memory: Optional[TranslationMemory] = None
+        self._memory_failed = False
+        self._retry_budget: Optional[RetryBudget] = None  # translate_chapters 작업 동안만
+        self._warm_up_task: Optional[asyncio.Task] = None
     
-    async def _get_client(self) -> httpx.AsyncClient:
-        """커넥션 풀을 재활용하는 HTTP 클라이언트 (싱글톤)"""
-        if self._client is None or self._client.is_closed:
-            self._client = httpx.AsyncClient(
-                base_url=self.config.base_url,
+    async def _get_client(self, base_url: Optional[str] = None) -> httpx.AsyncClient:
+        """커넥션 풀을 재활용하는 HTTP 클라이언트 (서버별 싱글톤)"""
+        base_url = base_url or self.config.base_url
+        client = self._clients.get(base_url)
+        if client is None or client.is_closed:
+            client = self._clients[base_url] = httpx.AsyncClient(
+                base_url=base_url,
                 timeout=httpx.Timeout(self.config.timeout),
                 limits=httpx.Limits(
                     max_connections=self.config.connection_pool_size,
                     max_keepalive_connections=self.config.connection_pool_size
                 ),
-                http2=True  # HTTP/2 멀티플렉싱 활성화
+                http2=True,  # HTTP/2 멀티플렉싱 활성화
+                headers={"Authorization": f"Bearer {self.config.api_key}"} if self.config.api_key else None
+            )
+        return client
+    
+    def _get_pool(self) -> EndpointPool:
+        """요청을 보낼 서버 목록 (서버가 하나면 동시성은 limiter가 제한)"""
+        if self._pool is None:
+            endpoints = self.config.endpoints or ((self.config.base_url, self.config.max_concurrent_limit),)
+            self._pool = EndpointPool(
+                endpoints, self._get_client,
+                probe_interval=self.config.probe_interval,
+                failure_threshold=self.config.failure_threshold,
+                open_timeout=self.config.circuit_open_timeout,
+                probe_path=self.backend.probe_path
             )
-        return self._client
+        return self._pool
     
     async def close(self):
         """클라이언트 정리"""
-        if self._client and not self._client.is_closed:
-            await self._client.aclose()
-            self._client = None
+        if self._pool:
+            await self._pool.close()
+            self._pool = None
+        for client in self._clients.values():
+            if not client.is_closed:
+                await client.aclose()
+        self._clients.clear()
+        if self._memory:
+            self._memory.flush()
+    
+    def _get_memory(self) -> Optional[TranslationMemory]:
+        """번역 메모리 (처음 사용할 때 열고, 열 수 없으면 이번 실행 동안 끔)"""
+        if not self.config.translation_memory or self._memory_failed:
+            return None
+        if self._memory is None:
+            try:
+                self._memory = TranslationMemory(
+                    self.config.translation_memory_path,
+                    compress=self.config.translation_memory_compress,
+                    max_entries=self.config.translation_memory_max_entries,
+                    max_age_days=self.config.translation_memory_max_age_days
+                )
+            except (sqlite3.Error, OSError) as e:
+                print(f"번역 메모리를 열 수 없어 사용하지 않습니다: {e}")
+                self._memory_failed = True
+                return None
+        return self._memory
+    
+    def close_memory(self):
+        """번역 메모리 닫기 (이벤트 루프 스레드에서 호출)"""
+        if self._memory:
+            self._memory.close()
+            self._memory = None
+    
+    def _memory_key(self, text: str) -> bytes:
+        return TranslationMemory.make_key(
+            self.config.model_name, self.config.source_language, self.config.target_language,
+            f"{PROMPT_TEMPLATE_VERSION}-{self.config.api}", text
+        )
+    
+    def _memory_lookup(self, text: str) -> Optional[str]:
+        """HTTP 요청 전에 번역 메모리 조회"""
+        memory = self._get_memory()
+        return memory.get(self._memory_key(text)) if memory else None
+    
+    def _memory_store(self, text: str, translated: str):
+        memory = self._get_memory()
+        if memory and translated:
+            memory.put(self._memory_key(text), translated)
     
-    def _build_prompt(self, text: str) -> str:
+    def _system_prompt(self, batch: bool = False) -> str:
+        """chat 방식의 고정 지시문 (작업 내내 바이트 단위로 같아야 서버가 접두사를 재사용)"""
+        source_lang = f"from {self.config.source_language} " if self.config.source_language else ""
+        prompt = (f"You are a professional translator. Translate the text in each message {source_lang}"
+                  f"to {self.config.target_language}. Keep the meaning while making it natural in "
+                  f"{self.config.target_language}. Output ONLY the translation, nothing else. {MARKUP_INSTRUCTIONS}")
+        return f"{prompt} {BATCH_INSTRUCTIONS}" if batch else prompt
+    
+    def _build_request(self, text: str, batch: bool = False) -> Tuple[str, Dict[str, Any]]:
+        """(API 경로, 요청 본문) - 형식은 백엔드가 정함"""
+        max_tokens = self._output_token_limit(text)  # 최대 토큰 수 제한
+        if self.config.api == 'chat':
+            messages = [
+                {"role": "system", "content": self._system_prompt(batch)},
+                {"role": "user", "content": text}
+            ]
+            return self.backend.chat_request(messages, self.config.stream, max_tokens)
+        
+        return self.backend.completion_request(self._build_prompt(text, batch), self.config.stream, max_tokens)
+    
+    def _output_token_limit(self, text: str) -> int:
+        ratio = self.config.output_token_ratio or expansion_ratio(self.config.target_language)
+        return output_token_limit(
+            estimate_tokens(text), ratio, self.config.num_predict_margin,
+            self.config.num_predict_min, self.config.num_predict_max
+        )
+    
+    def _time_limit(self, payload: Dict[str, Any]) -> float:
+        return time_limit(
+            self.backend.max_tokens(payload), self.config.seconds_per_output_token,
+            self.config.timeout_min, self.config.timeout
+        )
+    
+    def start_warm_up(self) -> asyncio.Task:
+        """모델 미리 올리기 시작 (이벤트 루프 스레드에서 호출, 이미 진행 중이면 그 태스크)
+        다음 translate_chapters가 로딩이 끝날 때까지 요청을 보내지 않고, 로딩 시간을 따로 기록함
+        """
+        if self._warm_up_task is None:
+            self._warm_up_task = asyncio.get_running_loop().create_task(self._warm_up())
+        return self._warm_up_task
+    
+    async def _warm_up(self) -> float:
+        """모든 서버에 모델을 올리는 요청을 보냄 (Ollama는 프롬프트 없는 요청, keep_alive 포함);
+        가장 오래 걸린 서버의 로딩 시간(초), 서버 시작 때 모델을 올리는 백엔드는 0"""
+        request = self.backend.warm_up_request()
+        if request is None:
+            return 0.0
+        path, payload = request
+        
+        async def load(url: str) -> float:
+            started = time.perf_counter()
+            try:
+                client = await self._get_client(url)
+                response = await client.post(path, json=payload)
+                response.raise_for_status()
+                # 서버가 보고한 로딩 시간 (이미 올라와 있으면 거의 0)
+                return self.backend.load_seconds(response.json()) or time.perf_counter() - started
+            except Exception as e:
+                print(f"모델 미리 올리기 실패 ({url}): {e}")
+                return 0.0
+        
+        loads = await asyncio.gather(*(load(endpoint.url) for endpoint in self._get_pool().endpoints))
+        return max(loads, default=0.0)
+    
+    async def _unload_model(self):
+        """모든 서버에서 모델을 내림 (Ollama는 keep_alive=0 요청, 내릴 수 없는 백엔드는 아무것도 안 함)"""
+        request = self.backend.unload_request()
+        if request is None:
+            return
+        for endpoint in self._get_pool().endpoints:
+            try:
+                client = await self._get_client(endpoint.url)
+                await client.post(request[0], json=request[1])
+            except Exception as e:
+                print(f"모델 언로드 실패 ({endpoint.url}): {e}")
+    
+    def _build_prompt(self, text: str, batch: bool = False) -> str:
         """번역 프롬프트 생성"""
         source_lang = f"from {self.config.source_language} " if self.config.source_language else ""
+        batch_instructions = f"\n{BATCH_INSTRUCTIONS}" if batch else ""
         return f"""You are a professional translator. Translate the following text {source_lang}to {self.config.target_language}.
 Keep the meaning while making it natural in {self.config.target_language}. Output ONLY the translation, nothing else.
+{MARKUP_INSTRUCTIONS}{batch_instructions}
 
 Text:
 {text}
@@ -74,118 +481,654 @@ Translation:"""
         if not text.strip():
             return ""
         
-        prompt = self._build_prompt(text)
-        client = await self._get_client()
+        cached = self._memory_lookup(text)
+        if cached is not None:
+            return cached
+        
+        translated = (await self._generate(text)).text
+        self._memory_store(text, translated)
+        return translated
+
+    async def _generate(
+        self,
+        text: str,
+        cancel_event: Optional[asyncio.Event] = None,
+        stats: Optional[TranslationStats] = None,
+        token_callback: Optional[Callable[[int], Any]] = None,
+        batch: bool = False,
+        routes: Optional[Set[str]] = None
+    ) -> Generation:
+        """LLM 서버에 번역 요청 (재시도 포함)
+        - 4xx(모델 없음 등)는 바로 실패, 나머지는 지터를 준 지수 백오프 후 재시도 (작업의 재시도 예산 안에서)
+        - 반복 생성이나 생성 시간 초과는 끊고 repeat_penalty를 올려 재시도, 출력 토큰 상한에서 끊긴 응답은
+          num_predict_max로 다시 요청
+        - routes가 있으면 그 서버들은 다른 서버에 빈 슬롯이 없을 때만 고르고, 고른 서버를 추가함
+          (같은 요청의 복제본끼리 공유해 서로 다른 서버로 보냄)
+        """
+        path, payload = self._build_request(text, batch)
+        pool = self._get_pool()
+        budget = self._retry_budget
+        if budget:
+            budget.record_request()
         
         for attempt in range(self.config.max_retries):
             try:
-                response = await client.post(
-                    "/api/generate",
-                    json={
-                        "model": self.config.model_name,
-                        "prompt": prompt,
-                        "stream": False,
-                        "options": {
-                            "num_predict": 2048,  # 최대 토큰 수 제한
-                        }
-                    }
-                )
-                response.raise_for_status()
-                result = response.json()
-                return result.get("response", "").strip()
-                    
-            except httpx.TimeoutException:
-                if attempt == self.config.max_retries - 1:
-                    raise RuntimeError(f"번역 타임아웃 ({self.config.timeout}초 초과)")
-                await asyncio.sleep(0.5 * (attempt + 1))
-                
-            except httpx.HTTPStatusError as e:
-                if attempt == self.config.max_retries - 1:
-                    raise RuntimeError(f"HTTP 오류: {e.response.status_code}")
-                await asyncio.sleep(0.5 * (attempt + 1))
+                # 재시도마다 서버를 다시 고르므로 실패한 서버 대신 다른 서버로 넘어감
+                async with pool.slot(routes if routes is not None else frozenset()) as endpoint:
+                    if routes is not None:
+                        routes.add(endpoint.url)
+                    client = await self._get_client(endpoint.url)
+                    if self.config.stream:
+                        detector = RepetitionDetector(
+                            self.config.repetition_ngram, self.config.repetition_window,
+                            self.config.repetition_max_repeats
+                        ) if self.config.detect_repetition else None
+                        generation = await self._generate_stream(
+                            client, path, payload, cancel_event, stats, token_callback,
+                            self._time_limit(payload), detector
+                        )
+                    else:
+                        # 응답 전체를 한 번에 받으므로 대기열/생성 시간을 나눌 수 없음: timeout과 num_predict로만 제한
+                        response = await client.post(path, json=payload)
+                        response.raise_for_status()
+                        generation = self.backend.parse_response(response.json())
+                    endpoint.tokens += generation.eval_count
                 
+                if (generation.truncated and self.backend.max_tokens(payload) < self.config.num_predict_max
+                        and attempt < self.config.max_retries - 1):
+                    # 확장 비율 추정이 모자랐던 경우: 상한을 최대로 올려 다시 요청
+                    self.backend.set_max_tokens(payload, self.config.num_predict_max)
+                    if stats is not None:
+                        stats.retries += 1
+                        stats.retries_by_cause["length"] = stats.retries_by_cause.get("length", 0) + 1
+                    continue
+                return generation
+            
+            except CircuitOpenError:
+                raise
+            
             except Exception as e:
-                if attempt == self.config.max_retries - 1:
-                    raise RuntimeError(f"번역 실패: {e}")
-                await asyncio.sleep(0.5 * (attempt + 1))
+                cause = classify_error(e)
+                if (not is_retryable(cause) or attempt == self.config.max_retries - 1
+                        or (budget and not budget.try_retry())):
+                    raise RuntimeError(self._error_message(cause, e)) from e
+                if stats is not None:
+                    stats.retries += 1
+                    stats.retries_by_cause[cause] = stats.retries_by_cause.get(cause, 0) + 1
+                if cause == GENERATION:
+                    self.backend.set_repeat_penalty(payload, self.config.retry_repeat_penalty)
+                await asyncio.sleep(backoff_delay(attempt, self.config.retry_backoff_base, self.config.retry_backoff_max))
         
-        return ""
+        return Generation("")
+    
+    def _error_message(self, cause: str, error: Exception) -> str:
+        if cause == TIMEOUT:
+            return f"번역 타임아웃 ({str(error) or f'{self.config.timeout}초 초과'})"
+        if isinstance(error, httpx.HTTPStatusError):
+            try:
+                detail = error.response.json().get("error")
+            except Exception:
+                detail = None
+            return f"HTTP 오류: {error.response.status_code}" + (f" ({detail})" if detail else "")
+        if cause == CONNECTION:
+            return f"서버 연결 실패: {error}"
+        if cause == GENERATION:
+            return f"생성 중단: {error}"
+        return f"번역 실패: {error}"
 
-    async def _translate_chunk_with_index(
+    async def _generate_hedged(
         self,
-        index: int,
-        chunk_id: str,
-        content: str,
-        semaphore: asyncio.Semaphore,
-        cancel_event: asyncio.Event
-    ) -> Tuple[int, str, str]:
-        """인덱스 포함 청크 번역 (결과 정렬용)"""
-        if cancel_event.is_set():
-            return index, chunk_id, ""
-        
-        async with semaphore:
+        text: str,
+        cancel_event: asyncio.Event,
+        stats: TranslationStats,
+        token_callback: Optional[Callable[[int], Any]] = None,
+        hedge: Optional[HedgePolicy] = None,
+        batch: bool = False
+    ) -> Generation:
+        """hedge가 있으면 지연 분위수를 넘긴 요청을 다른 서버(없으면 같은 서버의 다른 슬롯)로 한 번 더 보냄
+        - 먼저 성공한 쪽을 쓰고 나머지는 취소 (연결을 끊으므로 서버의 생성도 멈춤)
+        - 한쪽이 실패하면 다른 쪽을 기다림
+        - 복제본은 limiter 슬롯을 기다리지 않음 (추가 부하는 hedge의 예산으로 제한)
+        """
+        if hedge is None:
+            return await self._generate(text, cancel_event, stats, token_callback, batch)
+        
+        started = time.perf_counter()
+        tokens = estimate_tokens(text)
+        hedge.requests += 1
+        routes: Set[str] = set()
+        attempts = [asyncio.ensure_future(
+            self._generate(text, cancel_event, stats, token_callback, batch, routes)
+        )]
+        try:
+            delay = hedge.delay(tokens)
+            if delay is not None:
+                done, _ = await asyncio.wait(attempts, timeout=delay)
+                if not done and hedge.try_hedge():
+                    stats.requests += 1
+                    attempts.append(asyncio.ensure_future(
+                        self._generate(text, cancel_event, stats, token_callback, batch, routes)
+                    ))
+            
+            pending = set(attempts)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    error = attempt.exception()
+                    if error is None:
+                        if attempt is not attempts[0]:
+                            hedge.wins += 1
+                        hedge.observe(time.perf_counter() - started, tokens)
+                        return attempt.result()
+            raise error
+        finally:
+            for attempt in attempts:
+                if not attempt.done():
+                    attempt.cancel()
+                elif not attempt.cancelled():
+                    attempt.exception()  # 진 쪽의 오류는 무시
+
+    async def _generate_stream(
+        self,
+        client: httpx.AsyncClient,
+        path: str,
+        payload: Dict[str, Any],
+        cancel_event: Optional[asyncio.Event],
+        stats: Optional[TranslationStats],
+        token_callback: Optional[Callable[[int], Any]],
+        limit: Optional[float] = None,
+        detector: Optional[RepetitionDetector] = None
+    ) -> Generation:
+        """토큰 스트림(Ollama는 NDJSON, OpenAI 호환은 SSE)을 받는 대로 소비
+        - 첫 토큰은 timeout, 이후에는 토큰 사이 간격이 stall_timeout을 넘으면 멈춘 생성으로 보고 중단
+        - 첫 토큰부터 limit초가 지나거나 detector가 반복을 감지하면 RunawayGenerationError
+        - 취소되면 연결을 끊어 서버의 생성도 바로 멈춤
+        """
+        started = time.perf_counter()
+        deadline: Optional[float] = None
+        parts: List[str] = []
+        tokens = 0
+        final: Dict[str, Any] = {}
+        
+        async with client.stream("POST", path, json=payload) as response:
+            if response.is_error:
+                await response.aread()  # 오류 메시지 (예: 모델 없음)
+            response.raise_for_status()
+            lines = response.aiter_lines()
+            while True:
+                wait = self.config.timeout if not parts else self.config.stall_timeout
+                if deadline is not None:
+                    wait = min(wait, deadline - time.perf_counter())
+                    if wait <= 0:
+                        raise RunawayGenerationError(f"생성 시간 제한 {limit:g}초 초과 (토큰 {tokens}개)")
+                try:
+                    line = await asyncio.wait_for(lines.__anext__(), wait)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    if deadline is not None and time.perf_counter() >= deadline:
+                        raise RunawayGenerationError(f"생성 시간 제한 {limit:g}초 초과 (토큰 {tokens}개)")
+                    raise httpx.ReadTimeout(f"{wait:g}초 동안 토큰 없음")
+                
+                if cancel_event is not None and cancel_event.is_set():
+                    raise asyncio.CancelledError()
+                event = self.backend.parse_stream_line(line)
+                if event is None:
+                    continue
+                if event.body:
+                    final.update(event.body)
+                
+                token = event.token
+                if token:
+                    if not parts:
+                        if stats is not None:
+                            stats.record_ttft(time.perf_counter() - started)
+                        if limit is not None:
+                            deadline = time.perf_counter() + limit
+                    if detector is not None and detector.feed(token):
+                        raise RunawayGenerationError(f"반복 생성 감지 ({detector.repeated!r}, 토큰 {tokens}개)")
+                    parts.append(token)
+                    tokens += 1
+                    if stats is not None:
+                        stats.tokens += 1
+                    if token_callback:
+                        token_callback(tokens)
+                
+                if event.done:
+                    break
+        
+        generation = self.backend.generation("".join(parts).strip(), final)
+        generation.eval_count = generation.eval_count or tokens
+        return generation
+
+    async def _translate_job(
+        self,
+        job: _ChunkJob,
+        limiter: AdaptiveLimiter,
+        cancel_event: asyncio.Event,
+        stats: TranslationStats,
+        token_callback: Optional[Callable[[int], Any]] = None,
+        hedge: Optional[HedgePolicy] = None
+    ) -> _ChunkJob:
+        """추론 요청 1건 실행 (결과는 job에 기록)"""
+        if cancel_event.is_set() or not job.content.strip():
+            return job
+        
+        # 번역 메모리 적중이면 동시성 슬롯을 기다리지 않음
+        cached = self._memory_lookup(job.content)
+        if cached is not None:
+            stats.memory_hits += 1
+            job.result = cached
+            return job
+        
+        return await self._request_job(job, limiter, cancel_event, stats, token_callback, hedge)
+
+    async def _request_job(
+        self,
+        job: _ChunkJob,
+        limiter: AdaptiveLimiter,
+        cancel_event: asyncio.Event,
+        stats: TranslationStats,
+        token_callback: Optional[Callable[[int], Any]] = None,
+        hedge: Optional[HedgePolicy] = None
+    ) -> _ChunkJob:
+        """번역 메모리를 거치지 않고 서버에 요청"""
+        async with limiter:
             if cancel_event.is_set():
-                return index, chunk_id, ""
+                return job
             
-            translated = await self.translate_text(content)
-            return index, chunk_id, translated
+            stats.requests += 1
+            started = time.perf_counter()
+            try:
+                generation = await self._generate_hedged(job.content, cancel_event, stats, token_callback, hedge)
+            except Exception as e:
+                # 4xx나 생성 폭주는 서버 과부하가 아니므로 동시 요청 수를 줄이지 않음
+                if counts_against_server(classify_error(e.__cause__ or e)):
+                    limiter.record_failure()
+                raise
+            limiter.record(time.perf_counter() - started, generation.eval_count)
+            stats.record_generation(generation)
+            job.result = generation.text
+            self._memory_store(job.content, job.result)
+            return job
+
+    async def _translate_batch(
+        self,
+        jobs: List[_ChunkJob],
+        limiter: AdaptiveLimiter,
+        cancel_event: asyncio.Event,
+        stats: TranslationStats,
+        token_callback: Optional[Callable[[int], Any]] = None,
+        hedge: Optional[HedgePolicy] = None
+    ):
+        """짧은 청크 묶음을 요청 1건으로 번역 (결과는 각 job에 기록)
+        - 번역 메모리 적중은 빼고 나머지만 묶음
+        - 응답의 구분자가 맞지 않거나 요청이 실패하면 청크별 개별 요청으로 다시 번역
+        """
+        misses = []
+        for job in jobs:
+            if cancel_event.is_set():
+                return
+            if not job.content.strip():
+                continue
+            cached = self._memory_lookup(job.content)
+            if cached is not None:
+                stats.memory_hits += 1
+                job.result = cached
+            else:
+                misses.append(job)
+        
+        parts = None
+        if len(misses) > 1:
+            async with limiter:
+                if cancel_event.is_set():
+                    return
+                stats.requests += 1
+                stats.batches += 1
+                started = time.perf_counter()
+                try:
+                    generation = await self._generate_hedged(
+                        _join_batch([job.content for job in misses]), cancel_event, stats, token_callback, hedge,
+                        batch=True
+                    )
+                except Exception as e:
+                    if counts_against_server(classify_error(e.__cause__ or e)):
+                        limiter.record_failure()
+                    print(f"묶음 요청 실패, 개별 요청으로 다시 번역합니다: {e}")
+                else:
+                    limiter.record(time.perf_counter() - started, generation.eval_count)
+                    stats.record_generation(generation)
+                    parts = _split_batch(generation.text, len(misses))
+                    if parts is None:
+                        print(f"묶음 응답의 구분자가 맞지 않아 {len(misses)}개 청크를 개별 요청으로 다시 번역합니다")
+        
+        if parts is not None:
+            stats.batched_chunks += len(misses)
+            for job, translated in zip(misses, parts):
+                job.result = translated
+                self._memory_store(job.content, translated)
+            return
+        
+        if len(misses) > 1:
+            stats.batch_fallbacks += 1
+        
+        async def request(job: _ChunkJob):
+            try:
+                await self._request_job(job, limiter, cancel_event, stats, token_callback, hedge)
+            except Exception as e:
+                job.error = e
+        
+        await asyncio.gather(*(request(job) for job in misses))
 
     async def translate_chapters(
         self,
-        chapters: List[Tuple[str, str]],
+        chapters: ChunkSource,
         progress_callback: Optional[Callable[[int, int, str, str], Any]] = None,
-        cancel_event: Optional[asyncio.Event] = None
+        cancel_event: Optional[asyncio.Event] = None,
+        journal: Optional[TranslationJournal] = None,
+        resume: bool = True,
+        token_callback: Optional[Callable[[int], Any]] = None,
+        sink: Optional[ChunkSink] = None
     ) -> Dict[str, str]:
         """
         챕터 목록 병렬 번역 (최적화 버전)
-        - as_completed()로 먼저 끝난 것부터 처리
+        - 리스트뿐 아니라 파서의 청크 스트림(동기/비동기)을 바로 소비
+        - 공백만 다른 동일 청크는 요청 1건으로 합치고 (진행 중인 요청 포함) 결과를 모든 위치에 배포
+        - 요청은 동시성 상한만큼의 워커가 제한된 큐에서 꺼내 처리하므로 책 크기와 무관하게 메모리가 일정
+        - 먼저 끝난 것부터 처리하고, 결과는 읽기 순서대로 챕터별로 합침
+        - journal이 있으면 완료된 청크를 기록하고, resume이면 이전 실행에서 끝난 청크는 요청하지 않음
+          (모두 성공하면 저널 삭제)
+        - progress_callback(완료 수, 전체 수, 원문, 번역)의 전체 수는 스트림이면 파싱이 끝날 때까지 0 (알 수 없음)
+        - token_callback(지금까지 받은 전체 토큰 수)은 스트리밍 중 토큰이 도착할 때마다 호출
+        - sink(인덱스, 챕터 ID, 번역)는 앞에서부터 연속으로 끝난 청크마다 읽기 순서대로 바로 호출
+          (config.reorder_window가 있으면 순서가 어긋난 채 보관하는 결과도 그 크기로 제한)
+        - config.hedge_requests면 유난히 느린 요청을 복제해 먼저 끝난 쪽을 사용
+        - 모델 미리 올리기(start_warm_up 또는 config.warm_up)가 끝날 때까지 요청은 보내지 않고 파싱만 진행
         """
         if cancel_event is None:
             cancel_event = asyncio.Event()
         
-        semaphore = asyncio.Semaphore(self.config.max_concurrent)
-        translated_chapters: Dict[str, str] = {}
-        total = len(chapters)
-        completed = 0
+        stats = self.last_stats = TranslationStats()
+        pool = self._get_pool()
+        pool.reset_counters()
+        # 번역 메모리 통계는 누적이므로 이번 작업 몫만 따로 계산
+        memory = self._get_memory()
+        memory_before = replace(memory.stats) if memory else None
+        
+        # 모델 로딩: 그동안 dispatch는 파싱을 계속해 큐를 채우고, 워커는 로딩이 끝나면 요청 시작
+        job_started = time.perf_counter()
+        ready_at = job_started
+        model_ready = asyncio.Event()
+        warm_up = self._warm_up_task or (self.start_warm_up() if self.config.warm_up else None)
         
-        # 모든 번역 태스크 생성
-        tasks = [
-            asyncio.create_task(
-                self._translate_chunk_with_index(i, chapter_id, content, semaphore, cancel_event)
+        def on_model_ready(_):
+            nonlocal ready_at
+            ready_at = time.perf_counter()
+            model_ready.set()
+        
+        if warm_up:
+            warm_up.add_done_callback(on_model_ready)
+        else:
+            model_ready.set()
+        if len(pool.endpoints) > 1:
+            # 서버별 가중치가 동시성을 정함 (서로 다른 서버의 지연을 하나로 섞어 조절하지 않음)
+            limiter = AdaptiveLimiter(pool.total_weight, pool.total_weight, pool.total_weight)
+        elif self.config.adaptive_concurrency:
+            limiter = AdaptiveLimiter(
+                self.config.max_concurrent, self.config.min_concurrent, self.config.max_concurrent_limit
             )
-            for i, (chapter_id, content) in enumerate(chapters)
-        ]
+        else:
+            limiter = AdaptiveLimiter(self.config.max_concurrent, self.config.max_concurrent, self.config.max_concurrent)
+        
+        self._retry_budget = RetryBudget(self.config.retry_budget_ratio, self.config.retry_budget_min)
+        hedge = HedgePolicy(
+            self.config.hedge_percentile, self.config.hedge_min_samples,
+            self.config.hedge_min_delay, self.config.hedge_max_ratio
+        ) if self.config.hedge_requests else None
+        
+        # 동시성 상한만큼 워커를 두고, limiter가 그중 몇 개가 실제로 요청할지 정함
+        worker_count = limiter.max_limit
+        job_queue: asyncio.Queue = asyncio.Queue(maxsize=worker_count * self.config.queue_depth_per_worker)
+        
+        def on_token(_):
+            if token_callback:
+                token_callback(stats.tokens)
+
+        # 스트림이면 파싱이 끝날 때까지 전체 개수를 모름 (0으로 보고)
+        total = len(chapters) if isinstance(chapters, (list, tuple)) else 0
+        completed = 0
+        results: Dict[int, Tuple[Any, str]] = {}
+        jobs: Dict[bytes, _ChunkJob] = {}
+        done_queue: asyncio.Queue = asyncio.Queue()
+        outstanding = 0  # 워커 큐에 넣었지만 아직 결과를 받지 못한 요청 수
+        # 순서 맞추기: 끝났지만 앞 청크를 기다리는 결과 (인덱스 -> (챕터 ID, 번역))
+        window = self.config.reorder_window
+        pending: Dict[int, Tuple[Any, Optional[str]]] = {}
+        released = 0  # 이 인덱스 앞까지는 sink로 내보냄
+        window_open = asyncio.Event()
+        journaled = journal.open(resume) if journal else {}
+        if journaled:
+            print(f"번역 저널에서 완료된 청크 {len(journaled)}개를 불러왔습니다: {journal.path}")
+        
+        async def worker():
+            """큐에서 요청(또는 짧은 청크 묶음)을 꺼내 처리하고 끝난 요청을 done_queue로 보냄"""
+            await model_ready.wait()
+            while True:
+                item = await job_queue.get()
+                batch = item if isinstance(item, list) else [item]
+                try:
+                    if isinstance(item, list):
+                        await self._translate_batch(item, limiter, cancel_event, stats, on_token, hedge)
+                    else:
+                        await self._translate_job(item, limiter, cancel_event, stats, on_token, hedge)
+                except Exception as e:
+                    for job in batch:
+                        job.error = job.error or e
+                for job in batch:
+                    done_queue.put_nowait(job)
+        
+        # 아직 큐에 넣지 않은 짧은 청크 묶음
+        batch: List[_ChunkJob] = []
+        batch_tokens = 0
+        
+        async def enqueue(job: _ChunkJob):
+            """요청을 워커 큐에 넣음 (큐가 차 있으면 워커가 따라잡을 때까지 스트림을 더 읽지 않음)"""
+            nonlocal outstanding, batch_tokens
+            if not self.config.batch_short_chunks:
+                outstanding += 1
+                await job_queue.put(job)
+                return
+            
+            tokens = estimate_tokens(job.content)
+            if tokens > self.config.batch_max_chunk_tokens:
+                outstanding += 1
+                await job_queue.put(job)
+                return
+            if batch and batch_tokens + tokens > self.config.batch_max_tokens:
+                await flush_batch()
+            batch.append(job)
+            batch_tokens += tokens
+            if len(batch) >= self.config.batch_max_size:
+                await flush_batch()
+        
+        async def flush_batch():
+            nonlocal batch, batch_tokens, outstanding
+            if not batch:
+                return
+            item, batch, batch_tokens = (batch if len(batch) > 1 else batch[0]), [], 0
+            outstanding += len(item) if isinstance(item, list) else 1
+            await job_queue.put(item)
         
-        # as_completed()로 먼저 끝난 것부터 처리 (더 빠른 진행률 업데이트)
+        async def dispatch():
+            """청크가 도착하는 즉시 요청 생성 (중복이면 기존 요청에 위치만 추가)"""
+            async for chapter_id, content in _aiter_chunks(chapters):
+                if window and stats.chunks - released >= window:
+                    # 맨 앞 청크가 아직 묶음에 있을 수 있으므로 먼저 내보냄
+                    await flush_batch()
+                # 창이 가득 차면 맨 앞 청크가 끝날 때까지 더 읽지 않음
+                while window and stats.chunks - released >= window and not cancel_event.is_set():
+                    window_open.clear()
+                    await window_open.wait()
+                if cancel_event.is_set():
+                    break
+                position = (stats.chunks, chapter_id)
+                stats.chunks += 1
+                
+                key = _dedup_key(content)
+                entry = journaled.get(position[0])
+                if entry is not None and entry[1] == key:
+                    # 이전 실행에서 완료된 위치 (원문이 같을 때만)
+                    stats.resumed += 1
+                    job = _ChunkJob(content, [position], result=entry[2], done=True, key=key)
+                    jobs.setdefault(key, job)
+                    done_queue.put_nowait((job, [position]))
+                    continue
+                
+                job = jobs.get(key)
+                if job is not None:
+                    stats.deduplicated += 1
+                    job.positions.append(position)
+                    if job.done:
+                        # 이미 끝난 요청이면 결과만 바로 배포
+                        done_queue.put_nowait((job, [position]))
+                    continue
+                
+                job = jobs[key] = _ChunkJob(content, [position], key=key)
+                
+                rule = passthrough_rule(content, self.config.passthrough_rules)
+                if rule is not None:
+                    # 번역이 필요 없는 청크: 요청 없이 원문 그대로
+                    stats.passthrough += 1
+                    stats.passthrough_by_rule[rule] = stats.passthrough_by_rule.get(rule, 0) + 1
+                    job.result = content
+                    job.done = True
+                    done_queue.put_nowait((job, [position]))
+                    continue
+                
+                await enqueue(job)
+            
+            await flush_batch()
+        
+        def release():
+            """앞에서부터 연속으로 끝난 결과를 sink로 내보내고 창을 엶"""
+            nonlocal released
+            while released in pending:
+                chunk_id, translated = pending.pop(released)
+                if sink:
+                    sink(released, chunk_id, translated)
+                released += 1
+            window_open.set()
+        
+        def deliver(job: _ChunkJob, positions: List[Tuple[int, Any]]):
+            """요청 결과를 해당 위치들에 기록"""
+            nonlocal completed
+            for index, chunk_id in positions:
+                completed += 1
+                if sink or window:
+                    pending[index] = (chunk_id, job.result if job.error is None else None)
+                if job.error is not None:
+                    stats.failed += 1
+                    continue
+                results[index] = (chunk_id, job.result)
+                if journal and index not in journaled:
+                    journal.append(index, chunk_id, job.key, job.result)
+                if progress_callback:
+                    progress_callback(completed, total, job.content[:100], job.result[:100])
+            if sink or window:
+                release()
+        
+        workers = [asyncio.create_task(worker()) for _ in range(worker_count)]
+        producer = asyncio.create_task(dispatch())
+        producer.add_done_callback(done_queue.put_nowait)
+        # 취소되면 결과를 기다리지 않고 바로 깨어나 생성 중인 스트림을 끊음
+        cancel_watch = asyncio.create_task(cancel_event.wait())
+        cancel_watch.add_done_callback(done_queue.put_nowait)
+        parsing_finished = False
+        
+        # 먼저 끝난 것부터 처리 (더 빠른 진행률 업데이트)
         try:
-            for coro in asyncio.as_completed(tasks):
+            while not parsing_finished or outstanding or not done_queue.empty():
+                item = await done_queue.get()
+                
                 if cancel_event.is_set():
-                    # 남은 태스크 취소
-                    for task in tasks:
-                        if not task.done():
-                            task.cancel()
                     break
                 
-                try:
-                    index, chunk_id, translated = await coro
-                    translated_chapters[chunk_id] = translated
-                    completed += 1
-                    
-                    if progress_callback:
-                        original = chapters[index][1][:100] if index < len(chapters) else ""
-                        progress_callback(completed, total, original, translated[:100])
-                        
-                except asyncio.CancelledError:
+                if item is producer:
+                    # 파싱 오류는 그대로 전파
+                    producer.result()
+                    parsing_finished = True
+                    if not total and stats.chunks:
+                        # 이제 전체 개수를 알게 됨
+                        total = stats.chunks
+                        if progress_callback:
+                            progress_callback(completed, total, "", "")
                     continue
-                except Exception as e:
-                    print(f"번역 오류: {e}")
-                    completed += 1
+                
+                if isinstance(item, tuple):
+                    # 원문 통과 청크, 또는 이미 끝난 요청과 중복인 청크
+                    deliver(*item)
+                    continue
+                
+                # 워커가 끝낸 요청
+                job = item
+                outstanding -= 1
+                job.done = True
+                if job.error is not None:
+                    print(f"번역 오류: {job.error}")
+                deliver(job, job.positions)
                     
         finally:
+            # 워커와 남은 태스크 취소
+            tasks = [producer, cancel_watch, *workers] + ([warm_up] if warm_up else [])
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            # 취소가 끝날 때까지 기다림: 아니면 취소 중인 워커가 클라이언트를 닫은 뒤 새로 만들어 요청을 보냄
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._warm_up_task = None
+            if self.config.unload_after_job:
+                await self._unload_model()
+            self._retry_budget = None
+            stats.circuit_opens = pool.circuit_opens
+            if memory_before:
+                stats.memory_misses = memory.stats.misses - memory_before.misses
             # 클라이언트 정리
             await self.close()
+            if journal:
+                journal.close()
+        
+        if journal and not cancel_event.is_set() and not stats.failed:
+            journal.discard()
+        
+        if limiter.adaptive:
+            stats.concurrency = limiter.limit
+            stats.concurrency_adjustments = limiter.adjustments
+        if warm_up and not warm_up.cancelled():
+            stats.load_seconds = warm_up.result()
+        stats.elapsed = time.perf_counter() - ready_at
+        if hedge:
+            stats.hedged = hedge.hedges
+            stats.hedge_wins = hedge.wins
+        if len(pool.endpoints) > 1:
+            stats.endpoint_report = pool.report()
+        
+        print(f"번역 작업 요약: {stats.summary()}")
+        for line in stats.endpoint_report:
+            print(f"  {line}")
+        return self._assemble_chapters(results)
+    
+    @staticmethod
+    def _assemble_chapters(results: Dict[int, Tuple[Any, str]]) -> Dict[str, str]:
+        """청크 번역 결과를 읽기 순서대로 챕터 ID별로 합침"""
+        parts: Dict[Any, List[str]] = {}
+        for index in sorted(results):
+            chunk_id, translated = results[index]
+            parts.setdefault(chunk_id, [])
+            if translated:
+                parts[chunk_id].append(translated)
         
-        return translated_chapters
+        return {chunk_id: "\n\n".join(texts) for chunk_id, texts in parts.items()}
 
     def save_translation(self, translated_chapters: Dict[str, str], output_path: str):
         """번역 결과 저장"""
@@ -198,10 +1141,17 @@ Translation:"""
 
     def _save_as_text(self, translated_chapters: Dict[str, str], output_path: str):
         """텍스트 파일로 저장"""
+        # 블록 단위 청크는 문서 ID별로 묶어서 출력
+        documents: Dict[Any, List[str]] = {}
+        for chunk_id, translated_text in translated_chapters.items():
+            item_id, path = split_chunk_id(chunk_id)
+            # 블록 모드 번역에는 링크/강조 표시용 번호 태그가 들어 있음
+            documents.setdefault(item_id, []).append(block_plain_text(translated_text) if path else translated_text)
+        
         with open(output_path, 'w', encoding='utf-8') as f:
-            for chapter_id, translated_text in translated_chapters.items():
+            for chapter_id, texts in documents.items():
                 f.write(f"--- Chapter ID: {chapter_id} ---\n\n")
-                f.write(translated_text)
+                f.write("\n\n".join(texts))
                 f.write("\n\n")
         
         print(f"번역 결과 저장 완료: {output_path}")
@@ -213,12 +1163,25 @@ Translation:"""
             self._save_as_text(translated_chapters, text_path)
             return
         
-        book = epub.read_epub(self.last_parsed_file)
+        # 블록 모드 결과: 문서 ID -> {노드 경로: 번역}
+        block_translations: Dict[str, Dict[str, str]] = {}
+        for chunk_id, translated_text in translated_chapters.items():
+            item_id, path = split_chunk_id(chunk_id)
+            if path:
+                block_translations.setdefault(item_id, {})[path] = translated_text
         
-        for item in book.get_items():
-            if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                if item.get_id() in translated_chapters:
-                    content = item.get_content().decode('utf-8')
+        # 번역된 문서만 압축 해제해서 수정하고, 이미지/폰트는 그대로 스트리밍 복사
+        replacements: Dict[str, bytes] = {}
+        with ZipEpub(self.last_parsed_file) as book:
+            for item in book.documents():
+                if item.get_id() in block_translations:
+                    # 문서를 한 번만 파싱해 해당 노드만 교체 (제목, 목록, 나머지 마크업 유지)
+                    content = book.read(item).decode('utf-8')
+                    patched = apply_block_translations(content, block_translations[item.get_id()])
+                    replacements[item.href] = patched.encode('utf-8')
+                
+                elif item.get_id() in translated_chapters:
+                    content = book.read(item).decode('utf-8')
                     soup = BeautifulSoup(content, 'html.parser')
                     body = soup.body
                     
@@ -233,12 +1196,38 @@ Translation:"""
                                 p.string = para.strip()
                                 body.append(p)
                         
-                        item.set_content(str(soup).encode('utf-8'))
+                        replacements[item.href] = str(soup).encode('utf-8')
+            
+            book.write_patched(output_path, replacements)
         
-        epub.write_epub(output_path, book)
         print(f"번역된 EPUB 저장 완료: {output_path}")
 
 
+class OrderedTextWriter:
+    """읽기 순서대로 내보낸 청크를 바로 텍스트 파일에 이어 씀 (translate_chapters의 sink)
+    - _save_as_text와 같은 형식이라 번역이 끝나기 전에도 앞부분부터 읽을 수 있음
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'w', encoding='utf-8')
+        self._document: Any = None
+        self._started = False
+    
+    def __call__(self, index: int, chunk_id: Any, translated: Optional[str]):
+        if not translated:
+            return
+        item_id, path = split_chunk_id(chunk_id)
+        if not self._started or item_id != self._document:
+            self._file.write(f"--- Chapter ID: {item_id} ---\n\n")
+            self._document, self._started = item_id, True
+        self._file.write((block_plain_text(translated) if path else translated) + "\n\n")
+        self._file.flush()
+    
+    def close(self):
+        self._file.close()
+
+
 class SyncTranslatorWrapper:
     """기존 GUI와 호환을 위한 동기 래퍼 (최적화 버전)"""
     
@@ -248,14 +1237,24 @@ class SyncTranslatorWrapper:
         target_language: str = "한국어",
         source_language: Optional[str] = None,
         base_url: Optional[str] = None,
-        max_concurrent: int = 5
+        max_concurrent: int = 5,
+        adaptive_concurrency: bool = True,
+        endpoints: Optional[List[Tuple[str, int]]] = None,
+        reorder_window: int = 0,
+        backend: str = 'ollama',
+        api_key: Optional[str] = None
     ):
         self.config = TranslationConfig(
             model_name=model_name,
             target_language=target_language,
             source_language=source_language,
             base_url=base_url or "http://localhost:11434",
-            max_concurrent=max_concurrent
+            max_concurrent=max_concurrent,
+            adaptive_concurrency=adaptive_concurrency,
+            endpoints=tuple(endpoints or ()),
+            reorder_window=reorder_window,
+            backend=backend,
+            api_key=api_key
         )
         self._translator = AsyncEbookTranslator(self.config)
         self._cancel_event: Optional[asyncio.Event] = None
@@ -295,16 +1294,30 @@ class SyncTranslatorWrapper:
     def last_parsed_file(self, value: str):
         self._translator.last_parsed_file = value
     
+    @property
+    def last_stats(self) -> TranslationStats:
+        """마지막 번역 작업의 요약 통계"""
+        return self._translator.last_stats
+    
     def translate_text(self, text: str) -> str:
         """단일 텍스트 번역 (동기)"""
         return self._run_async(self._translator.translate_text(text))
     
     def translate_chapters(
         self,
-        chapters: List[Tuple[str, str]],
-        callback: Optional[Callable[[int, int], None]] = None
+        chapters: ChunkSource,
+        callback: Optional[Callable[[int, int], None]] = None,
+        journal_path: Optional[str] = None,
+        resume: bool = True,
+        token_callback: Optional[Callable[[int], None]] = None,
+        sink: Optional[ChunkSink] = None
     ) -> Dict[str, str]:
-        """챕터 목록 번역 (동기)"""
+        """챕터 목록 또는 파서 청크 스트림 번역 (동기)
+        
+        journal_path를 주면 완료된 청크를 기록하고, resume이면 이전 실행에서 끝난 청크를 건너뜀
+        token_callback은 스트리밍 중 지금까지 받은 전체 토큰 수로 호출됨 (이벤트 루프 스레드)
+        sink는 앞에서부터 끝난 청크를 읽기 순서대로 받음 (이벤트 루프 스레드)
+        """
         def progress_wrapper(current: int, total: int, source: str, translated: str):
             if callback:
                 callback(current, total)
@@ -314,10 +1327,19 @@ class SyncTranslatorWrapper:
             self._translator.translate_chapters(
                 chapters,
                 progress_callback=progress_wrapper,
-                cancel_event=self._cancel_event
+                cancel_event=self._cancel_event,
+                journal=TranslationJournal(journal_path) if journal_path else None,
+                resume=resume,
+                token_callback=token_callback,
+                sink=sink
             )
         )
     
+    def warm_up(self):
+        """모델 미리 올리기를 시작하고 바로 반환 (작업을 설정하자마자 불러 파싱과 겹쳐 실행)"""
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._translator.start_warm_up)
+    
     def request_cancel(self):
         """번역 취소 요청"""
         if self._cancel_event and self._loop:
@@ -330,6 +1352,7 @@ class SyncTranslatorWrapper:
     def cleanup(self):
         """리소스 정리"""
         if self._loop:
+            self._loop.call_soon_threadsafe(self._translator.close_memory)
             self._loop.call_soon_threadsafe(self._loop.stop)
         if self._loop_thread:
             self._loop_thread.join(timeout=2.0)
@@ -0,0 +1,240 @@
+"""
+Inference server backends
+- Request payloads, response/stream parsing and model load/unload requests for one kind of server
+- Ollama (/api/chat, /api/generate, NDJSON streams)
+- OpenAI-compatible servers such as llama.cpp server, vLLM and TGI (/v1/chat/completions, /v1/completions, SSE)
+"""
+
+import json
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+Request = Tuple[str, Dict[str, Any]]  # (API path, JSON body)
+
+
+@dataclass
+class Generation:
+    """One LLM response (token counts and times as reported by the server, times in seconds)"""
+    text: str
+    eval_count: int = 0
+    eval_duration: float = 0.0
+    prompt_eval_count: int = 0
+    prompt_eval_duration: float = 0.0
+    truncated: bool = False  # Stopped at the output-token limit
+
+
+@dataclass
+class StreamEvent:
+    """One line of a streamed response"""
+    token: str = ""
+    done: bool = False
+    # Metadata carried by this line (usage, stop reason), merged into what generation() receives
+    body: Optional[Dict[str, Any]] = None
+
+
+class Backend(ABC):
+    """How one kind of inference server is spoken to"""
+    name = ""
+    probe_path = ""  # GET that answers 200 when the server is up
+
+    def __init__(self, model: str, keep_alive: Optional[Union[str, int]] = None):
+        self.model = model
+        self.keep_alive = keep_alive
+
+    @abstractmethod
+    def chat_request(self, messages: List[Dict[str, str]], stream: bool, max_tokens: int) -> Request:
+        """Chat request for the messages, generating at most max_tokens"""
+
+    @abstractmethod
+    def completion_request(self, prompt: str, stream: bool, max_tokens: int) -> Request:
+        """Raw completion request for the prompt, generating at most max_tokens"""
+
+    @abstractmethod
+    def max_tokens(self, payload: Dict[str, Any]) -> int:
+        """Output-token limit set in a request body"""
+
+    @abstractmethod
+    def set_max_tokens(self, payload: Dict[str, Any], max_tokens: int):
+        """Change the output-token limit of a request body"""
+
+    @abstractmethod
+    def set_repeat_penalty(self, payload: Dict[str, Any], penalty: float):
+        """Discourage repetition on a retry after a runaway generation (penalty as in llama.cpp, 1.0 = off)"""
+
+    @abstractmethod
+    def generation(self, text: str, body: Dict[str, Any]) -> Generation:
+        """Generation from the generated text and the response (or merged stream) metadata"""
+
+    @abstractmethod
+    def parse_response(self, body: Dict[str, Any]) -> Generation:
+        """Non-streamed response body"""
+
+    @abstractmethod
+    def parse_stream_line(self, line: str) -> Optional[StreamEvent]:
+        """One line of a streamed response; None for lines that carry nothing. Raises on error messages."""
+
+    def warm_up_request(self) -> Optional[Request]:
+        """Request that loads the model, or None if the server loads it at startup"""
+        return None
+
+    def load_seconds(self, body: Dict[str, Any]) -> float:
+        """Model load time reported in the warm-up response (0 if not reported)"""
+        return 0.0
+
+    def unload_request(self) -> Optional[Request]:
+        """Request that frees the model's memory, or None if the server can't"""
+        return None
+
+
+class OllamaBackend(Backend):
+    name = "ollama"
+    probe_path = "/api/version"
+
+    def _payload(self, stream: bool, max_tokens: int) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"model": self.model, "stream": stream, "options": {"num_predict": max_tokens}}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+
+    def chat_request(self, messages, stream, max_tokens):
+        payload = self._payload(stream, max_tokens)
+        payload["messages"] = messages
+        return "/api/chat", payload
+
+    def completion_request(self, prompt, stream, max_tokens):
+        payload = self._payload(stream, max_tokens)
+        payload["prompt"] = prompt
+        return "/api/generate", payload
+
+    def max_tokens(self, payload):
+        return payload["options"]["num_predict"]
+
+    def set_max_tokens(self, payload, max_tokens):
+        payload["options"]["num_predict"] = max_tokens
+
+    def set_repeat_penalty(self, payload, penalty):
+        payload["options"]["repeat_penalty"] = penalty
+
+    @staticmethod
+    def _text(body: Dict[str, Any]) -> str:
+        """/api/chat puts the text in message.content, /api/generate in response"""
+        if "message" in body:
+            return (body["message"] or {}).get("content", "")
+        return body.get("response", "")
+
+    def generation(self, text, body):
+        return Generation(
+            text=text,
+            eval_count=body.get("eval_count", 0),
+            eval_duration=body.get("eval_duration", 0) / 1e9,
+            prompt_eval_count=body.get("prompt_eval_count", 0),
+            prompt_eval_duration=body.get("prompt_eval_duration", 0) / 1e9,
+            truncated=body.get("done_reason") == "length"
+        )
+
+    def parse_response(self, body):
+        return self.generation(self._text(body).strip(), body)
+
+    def parse_stream_line(self, line):
+        if not line.strip():
+            return None
+        message = json.loads(line)
+        if message.get("error"):
+            raise RuntimeError(message["error"])
+        done = bool(message.get("done"))
+        return StreamEvent(self._text(message), done, message if done else None)
+
+    def warm_up_request(self):
+        # A request without a prompt only loads the model
+        payload: Dict[str, Any] = {"model": self.model, "stream": False}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return "/api/generate", payload
+
+    def load_seconds(self, body):
+        return body.get("load_duration", 0) / 1e9
+
+    def unload_request(self):
+        return "/api/generate", {"model": self.model, "keep_alive": 0}
+
+
+class OpenAIBackend(Backend):
+    """OpenAI-compatible server; the model is loaded when the server starts, so keep_alive is ignored"""
+    name = "openai"
+    probe_path = "/v1/models"
+
+    @staticmethod
+    def _payload(stream: bool, max_tokens: int) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"stream": stream, "max_tokens": max_tokens}
+        if stream:
+            # Token counts are only sent in a final chunk, and only when asked for
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+
+    def chat_request(self, messages, stream, max_tokens):
+        return "/v1/chat/completions", {"model": self.model, "messages": messages, **self._payload(stream, max_tokens)}
+
+    def completion_request(self, prompt, stream, max_tokens):
+        return "/v1/completions", {"model": self.model, "prompt": prompt, **self._payload(stream, max_tokens)}
+
+    def max_tokens(self, payload):
+        return payload["max_tokens"]
+
+    def set_max_tokens(self, payload, max_tokens):
+        payload["max_tokens"] = max_tokens
+
+    def set_repeat_penalty(self, payload, penalty):
+        # The portable knob is frequency_penalty (0 = off); llama.cpp's 1.3 maps to 0.3
+        payload["frequency_penalty"] = max(0.0, penalty - 1.0)
+
+    @staticmethod
+    def _choice_text(choice: Dict[str, Any]) -> str:
+        """Chat stream delta, chat message or completion text"""
+        message = choice.get("delta") or choice.get("message") or {}
+        return message.get("content") or choice.get("text") or ""
+
+    def generation(self, text, body):
+        usage = body.get("usage") or {}
+        return Generation(
+            text=text,
+            eval_count=usage.get("completion_tokens", 0),
+            prompt_eval_count=usage.get("prompt_tokens", 0),
+            truncated=body.get("finish_reason") == "length"
+        )
+
+    def parse_response(self, body):
+        choice = (body.get("choices") or [{}])[0]
+        return self.generation(
+            self._choice_text(choice).strip(), {"usage": body.get("usage"), "finish_reason": choice.get("finish_reason")}
+        )
+
+    def parse_stream_line(self, line):
+        # Server-sent events: "data: {...}" lines, ending with "data: [DONE]"
+        if not line.startswith("data:"):
+            return None
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return StreamEvent(done=True)
+        message = json.loads(data)
+        if message.get("error"):
+            error = message["error"]
+            raise RuntimeError(error.get("message", error) if isinstance(error, dict) else error)
+
+        choice = (message.get("choices") or [{}])[0]
+        body = {}
+        if choice.get("finish_reason"):
+            body["finish_reason"] = choice["finish_reason"]
+        if message.get("usage"):
+            body["usage"] = message["usage"]
+        return StreamEvent(self._choice_text(choice), False, body or None)
+
+
+BACKENDS = {backend.name: backend for backend in (OllamaBackend, OpenAIBackend)}
+
+
+def make_backend(name: str, model: str, keep_alive: Optional[Union[str, int]] = None) -> Backend:
+    try:
+        return BACKENDS[name](model, keep_alive)
+    except KeyError:
+        raise ValueError(f"unknown backend {name!r} (choose from {', '.join(BACKENDS)})")
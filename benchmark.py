@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Performance benchmarks for the parsing and translation pipeline
+
+Usage:
+    python benchmark.py epub [--path book.epub] [--documents 2000] [--workers 8]
+    python benchmark.py segment [--paragraphs 2000]
+    python benchmark.py epub-memory [--path book.epub] [--images 40] [--image-mb 2]
+    python benchmark.py scheduler [--chunks 1000 10000 100000] [--concurrency 8]
+    python benchmark.py prompt-cache [--url http://localhost:11434] [--model gemma3:4b-it-qat] [--chunks 30]
+    python benchmark.py throughput --backend openai --url http://localhost:8000 --model MODEL [--chunks 200]
+        [--concurrency 16]
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import tracemalloc
+import multiprocessing
+
+from ebook_parser import EbookParser, HTML_BACKENDS
+from epub_zip import ZipEpub
+from async_translator import AsyncEbookTranslator, TranslationConfig, Generation, APIS
+from backends import BACKENDS
+import segmentation
+
+
+WORDS = ("the quick brown fox jumps over a lazy dog while the captain reads "
+         "an old letter about ships storms harbours and distant islands").split()
+
+
+def _random_paragraph(rng, sentences=6):
+    """Build a paragraph of plausible English sentences"""
+    return " ".join(
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+        for _ in range(sentences)
+    )
+
+
+def make_synthetic_epub(path, documents=2000, paragraphs=8, seed=0, images=0, image_bytes=0):
+    """Write an EPUB with many small XHTML documents (typical of split web-novel exports)"""
+    from ebooklib import epub
+
+    rng = random.Random(seed)
+    book = epub.EpubBook()
+    book.set_identifier("benchmark")
+    book.set_title("Benchmark Book")
+    book.set_language("en")
+
+    chapters = []
+    for i in range(documents):
+        chapter = epub.EpubHtml(title=f"Chapter {i + 1}", file_name=f"chapter_{i:05d}.xhtml", lang="en")
+        body = "".join(f"<p>{_random_paragraph(rng)}</p>" for _ in range(paragraphs))
+        chapter.content = f"<html><body><h1>Chapter {i + 1}</h1>{body}</body></html>"
+        book.add_item(chapter)
+        chapters.append(chapter)
+
+    for i in range(images):
+        # Random bytes don't compress, like real JPEG/PNG data
+        book.add_item(epub.EpubItem(uid=f"image_{i}", file_name=f"images/image_{i:04d}.jpg",
+                                    media_type="image/jpeg", content=os.urandom(image_bytes)))
+
+    book.toc = chapters
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    book.spine = ["nav"] + chapters
+    epub.write_epub(path, book)
+
+
+def _time_parse(parser, path):
+    """Return (seconds, chunk count) for one full parse"""
+    start = time.perf_counter()
+    chunks = parser.parse_ebook(path)
+    return time.perf_counter() - start, len(chunks)
+
+
+def bench_epub(args):
+    """Compare HTML backends and serial vs. process-parallel EPUB parsing"""
+    path = args.path
+    if not path:
+        path = os.path.join(tempfile.mkdtemp(), "synthetic.epub")
+        print(f"Generating synthetic EPUB with {args.documents} documents...")
+        make_synthetic_epub(path, documents=args.documents)
+
+    print(f"{'backend':<12} {'workers':>7} {'seconds':>9} {'chunks':>8} {'speedup':>8}")
+    baseline = None
+    for backend in HTML_BACKENDS:
+        for workers in sorted({1, args.workers}):
+            seconds, count = _time_parse(EbookParser(workers=workers, html_backend=backend), path)
+            baseline = baseline or seconds
+            print(f"{backend:<12} {workers:>7} {seconds:>9.2f} {count:>8} {baseline / seconds:>7.2f}x")
+
+
+def _peak_memory(func):
+    """Return (peak traced MB, seconds) for one call"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1024 * 1024), seconds
+
+
+def bench_epub_memory(args):
+    """Peak memory of ebooklib vs. the zip-level reader, for reading documents and saving"""
+    import ebooklib
+    from ebooklib import epub
+
+    path = args.path
+    if not path:
+        path = os.path.join(tempfile.mkdtemp(), "illustrated.epub")
+        print(f"Generating EPUB with 200 documents and {args.images} x {args.image_mb} MB images...")
+        make_synthetic_epub(path, documents=200, images=args.images, image_bytes=int(args.image_mb * 1024 * 1024))
+    output = os.path.join(tempfile.mkdtemp(), "out.epub")
+
+    def ebooklib_read():
+        book = epub.read_epub(path)
+        for item in book.get_items():
+            if item.get_type() == ebooklib.ITEM_DOCUMENT:
+                item.get_content()
+
+    def zip_read():
+        with ZipEpub(path) as book:
+            for item in book.documents():
+                book.read(item)
+
+    def ebooklib_save():
+        epub.write_epub(output, epub.read_epub(path))
+
+    def zip_save():
+        with ZipEpub(path) as book:
+            first = book.documents()[0]
+            book.write_patched(output, {first.href: book.read(first)})
+
+    print(f"{'path':<16} {'peak MB':>9} {'seconds':>9}")
+    for name, func in (("ebooklib read", ebooklib_read), ("zip read", zip_read),
+                       ("ebooklib save", ebooklib_save), ("zip save", zip_save)):
+        peak, seconds = _peak_memory(func)
+        print(f"{name:<16} {peak:>9.1f} {seconds:>9.2f}")
+
+
+def _segments_per_second(split, texts):
+    """Return (segments/sec, segment count) for splitting every text once"""
+    start = time.perf_counter()
+    count = sum(len(split(text)) for text in texts)
+    return count / (time.perf_counter() - start), count
+
+
+def bench_segment(args):
+    """Compare nltk.sent_tokenize with the cached Punkt model and the rule-based segmenter"""
+    rng = random.Random(0)
+    english = [_random_paragraph(rng) for _ in range(args.paragraphs)]
+    korean = ["오늘은 날씨가 맑았다. 선장은 오래된 편지를 읽었다! 배는 항구로 돌아올까? " * 3
+              for _ in range(args.paragraphs)]
+
+    candidates = [
+        ("regex", segmentation.regex_split_sentences),
+        ("auto", segmentation.split_sentences),
+    ]
+    if segmentation.punkt_available():
+        import nltk
+        candidates.insert(0, ("nltk.sent_tokenize", nltk.sent_tokenize))
+        candidates.insert(1, ("punkt (cached)", segmentation.get_punkt_tokenizer().tokenize))
+    else:
+        print("NLTK punkt data not installed; skipping the Punkt candidates")
+
+    print(f"{'segmenter':<20} {'text':<8} {'segments/sec':>14} {'segments':>9}")
+    for name, split in candidates:
+        for label, texts in (("english", english), ("korean", korean)):
+            rate, count = _segments_per_second(split, texts)
+            print(f"{name:<20} {label:<8} {rate:>14,.0f} {count:>9}")
+
+
+async def _fake_request(text):
+    """Stands in for the HTTP round trip: yields to the loop once"""
+    await asyncio.sleep(0)
+    return text
+
+
+async def _schedule_task_per_chunk(chunks, concurrency):
+    """Previous dispatch: one task per chunk waiting on a semaphore, results via done callbacks"""
+    semaphore = asyncio.Semaphore(concurrency)
+    done_queue = asyncio.Queue()
+
+    async def run(text):
+        async with semaphore:
+            return await _fake_request(text)
+
+    tasks = []
+    for text in chunks:
+        task = asyncio.create_task(run(text))
+        task.add_done_callback(done_queue.put_nowait)
+        tasks.append(task)
+    for _ in tasks:
+        (await done_queue.get()).result()
+
+
+async def _schedule_worker_pool(chunks, concurrency, depth=4):
+    """Current dispatch: fixed workers pulling from a bounded queue"""
+    job_queue = asyncio.Queue(maxsize=concurrency * depth)
+    done_queue = asyncio.Queue()
+
+    async def worker():
+        while True:
+            done_queue.put_nowait(await _fake_request(await job_queue.get()))
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+
+    async def produce():
+        for text in chunks:
+            await job_queue.put(text)
+
+    producer = asyncio.create_task(produce())
+    for _ in chunks:
+        await done_queue.get()
+    await producer
+    for task in workers:
+        task.cancel()
+
+
+class _InstantTranslator(AsyncEbookTranslator):
+    """translate_chapters with the LLM call replaced by a no-op, to time the pipeline itself"""
+
+    async def _generate(self, text, *args, **kwargs):
+        await asyncio.sleep(0)
+        return Generation(text, eval_count=1)
+
+
+def bench_scheduler(args):
+    """Scheduling overhead and peak memory of task-per-chunk vs. worker-pool dispatch"""
+    config = TranslationConfig(translation_memory=False, max_concurrent=args.concurrency,
+                               adaptive_concurrency=False, warm_up=False)
+    print(f"{'dispatch':<20} {'chunks':>8} {'seconds':>9} {'us/chunk':>9} {'peak MB':>9}")
+    for count in args.chunks:
+        # Distinct texts so deduplication doesn't shrink the translate_chapters run
+        chunks = [f"paragraph {i} " + "lorem ipsum dolor sit amet " * 8 for i in range(count)]
+        candidates = (
+            ("task per chunk", lambda: asyncio.run(_schedule_task_per_chunk(chunks, args.concurrency))),
+            ("worker pool", lambda: asyncio.run(_schedule_worker_pool(chunks, args.concurrency))),
+            ("translate_chapters", lambda: asyncio.run(
+                _InstantTranslator(config).translate_chapters([("doc", text) for text in chunks]))),
+        )
+        for name, func in candidates:
+            peak, seconds = _peak_memory(func)
+            print(f"{name:<20} {count:>8} {seconds:>9.2f} {seconds / count * 1e6:>9.1f} {peak:>9.1f}")
+
+
+def bench_prompt_cache(args):
+    """Prompt evaluation per request on a live server: /api/generate (full prompt) vs. /api/chat (fixed system prefix)"""
+    rng = random.Random(0)
+    chunks = [("doc", _random_paragraph(rng, sentences=3)) for _ in range(args.chunks)]
+
+    print(f"{'api':<10} {'requests':>8} {'prompt tok/req':>15} {'prompt ms/req':>14} {'seconds':>9}")
+    results = {}
+    for api in reversed(APIS):  # Current path first
+        config = TranslationConfig(model_name=args.model, base_url=args.url, api=api, translation_memory=False,
+                                   max_concurrent=1, adaptive_concurrency=False)
+        translator = AsyncEbookTranslator(config)
+        start = time.perf_counter()
+        asyncio.run(translator.translate_chapters(chunks))
+        seconds = time.perf_counter() - start
+        stats = translator.last_stats
+        requests = max(stats.prompt_eval_requests, 1)
+        results[api] = (stats.prompt_eval_tokens / requests, stats.prompt_eval_seconds / requests)
+        print(f"{api:<10} {stats.prompt_eval_requests:>8} {results[api][0]:>15.1f} "
+              f"{results[api][1] * 1000:>14.1f} {seconds:>9.2f}")
+
+    (generate_tokens, generate_seconds), (chat_tokens, chat_seconds) = results['generate'], results['chat']
+    if generate_tokens:
+        print(f"chat saves {1 - chat_tokens / generate_tokens:.0%} of prompt tokens evaluated and "
+              f"{(generate_seconds - chat_seconds) * 1000:.1f} ms per request")
+
+
+def bench_throughput(args):
+    """End-to-end translation throughput of one live server, to compare backends on the same hardware"""
+    rng = random.Random(0)
+    chunks = [("doc", _random_paragraph(rng, sentences=3)) for _ in range(args.chunks)]
+    config = TranslationConfig(model_name=args.model, base_url=args.url, backend=args.backend, api_key=args.api_key,
+                               translation_memory=False, max_concurrent=args.concurrency,
+                               adaptive_concurrency=False)
+    translator = AsyncEbookTranslator(config)
+    start = time.perf_counter()
+    asyncio.run(translator.translate_chapters(chunks))
+    seconds = time.perf_counter() - start
+    stats = translator.last_stats
+    print(f"{'backend':<10} {'chunks':>7} {'failed':>7} {'seconds':>9} {'chunks/s':>9} {'tokens/s':>9} {'TTFT avg':>9}")
+    print(f"{args.backend:<10} {stats.chunks:>7} {stats.failed:>7} {seconds:>9.2f} {stats.chunks / seconds:>9.2f} "
+          f"{stats.tokens / max(stats.elapsed, 1e-6):>9.1f} {stats.ttft_avg:>9.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    epub_parser = subparsers.add_parser("epub", help="EPUB parsing backends and parallel mode")
+    epub_parser.add_argument("--path", help="EPUB to parse (default: generate a synthetic one)")
+    epub_parser.add_argument("--documents", type=int, default=2000, help="documents in the synthetic EPUB")
+    epub_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    epub_parser.set_defaults(func=bench_epub)
+
+    segment_parser = subparsers.add_parser("segment", help="sentence segmentation throughput")
+    segment_parser.add_argument("--paragraphs", type=int, default=2000, help="paragraphs per language")
+    segment_parser.set_defaults(func=bench_segment)
+
+    memory_parser = subparsers.add_parser("epub-memory", help="EPUB reader/writer peak memory")
+    memory_parser.add_argument("--path", help="EPUB to read (default: generate an illustrated one)")
+    memory_parser.add_argument("--images", type=int, default=40, help="images in the generated EPUB")
+    memory_parser.add_argument("--image-mb", type=float, default=2, help="size of each image in MB")
+    memory_parser.set_defaults(func=bench_epub_memory)
+
+    scheduler_parser = subparsers.add_parser("scheduler", help="request dispatch overhead at large chunk counts")
+    scheduler_parser.add_argument("--chunks", type=int, nargs="+", default=[1000, 10000, 100000],
+                                  help="chunk counts to schedule")
+    scheduler_parser.add_argument("--concurrency", type=int, default=8, help="requests in flight")
+    scheduler_parser.set_defaults(func=bench_scheduler)
+
+    cache_parser = subparsers.add_parser("prompt-cache", help="prompt prefix reuse on a running Ollama server")
+    cache_parser.add_argument("--url", default="http://localhost:11434", help="Ollama server")
+    cache_parser.add_argument("--model", default="gemma3:4b-it-qat", help="model to translate with")
+    cache_parser.add_argument("--chunks", type=int, default=30, help="paragraphs to translate per API")
+    cache_parser.set_defaults(func=bench_prompt_cache)
+
+    throughput_parser = subparsers.add_parser("throughput", help="translation throughput of a running server")
+    throughput_parser.add_argument("--backend", choices=list(BACKENDS), default="ollama", help="server kind")
+    throughput_parser.add_argument("--url", default="http://localhost:11434", help="server")
+    throughput_parser.add_argument("--model", default="gemma3:4b-it-qat", help="model to translate with")
+    throughput_parser.add_argument("--api-key", help="Bearer token for OpenAI-compatible servers")
+    throughput_parser.add_argument("--chunks", type=int, default=200, help="paragraphs to translate")
+    throughput_parser.add_argument("--concurrency", type=int, default=16, help="requests in flight")
+    throughput_parser.set_defaults(func=bench_throughput)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
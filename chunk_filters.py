@@ -0,0 +1,90 @@
+"""
+Chunks that don't need the LLM
+- Pure numbers, URLs, ISBNs, code listings, dot-leader lists and separators pass through verbatim
+- Rules are cheap regex/character checks, selectable by name
+"""
+
+import re
+from typing import Callable, Dict, Iterable, Optional
+
+_NUMBER_RE = re.compile(r'^[\d\s.,:;/%+\-–—()#]+$')
+_URL_TOKEN_RE = re.compile(r'^(https?://|www\.)\S+$|^[\w.+-]+@[\w-]+\.[\w.-]+$', re.IGNORECASE)
+_ISBN_RE = re.compile(r'^(ISBN(-1[03])?:?\s*)?(97[89][-\s]?)?\d[\d\-\s]{7,14}[\dXx]$', re.IGNORECASE)
+_CODE_KEYWORDS = (
+    r'^\s*(def|class|return|import|from|function|var|let|const|public|private|static|void|#include|for|while|if)\b'
+)
+# A semicolon is code only where it ends a statement line or closes a block: prose uses it mid-line
+_CODE_MARKER_RE = re.compile(
+    r'[{}]|;[ \t]*$|;\s*\}|==|!=|=>|->|::|&&|\|\||\w\(.*?\)|' + _CODE_KEYWORDS,
+    re.MULTILINE
+)
+# Shapes of a listing rather than of prose that mentions code
+_CODE_STRUCTURE_RES = (
+    re.compile(r'[{}]'),
+    re.compile(r';[ \t]*$|;\s*\}', re.MULTILINE),
+    re.compile(r'\n(\t| {2,})\S'),  # Indented lines
+    re.compile(_CODE_KEYWORDS, re.MULTILINE),
+)
+_DOT_LEADER_RE = re.compile(r'(\.\s?){4,}\s*\d+')
+
+
+def is_punctuation(text) -> bool:
+    """Scene breaks and separators: '* * *', '———', '§'"""
+    return not any(ch.isalnum() for ch in text)
+
+
+def is_number(text) -> bool:
+    """Page numbers, dates, numeric tables"""
+    return bool(_NUMBER_RE.match(text)) and any(ch.isdigit() for ch in text)
+
+
+def is_url(text) -> bool:
+    """Only URLs and e-mail addresses"""
+    tokens = text.split()
+    return bool(tokens) and all(_URL_TOKEN_RE.match(token) for token in tokens)
+
+
+def is_isbn(text) -> bool:
+    """ISBN-10/13 with or without the 'ISBN' prefix"""
+    if not _ISBN_RE.match(text):
+        return False
+    digits = sum(ch.isdigit() for ch in text) + text.upper().endswith('X')
+    return digits in (10, 13)
+
+
+def is_code(text) -> bool:
+    """Source code listings: dense in braces, operators, calls and keywords, and shaped like code
+
+    Calls and operators alone also fill prose about code ('f(x) returns g(y)'), so at least two
+    kinds of structure are required: braces, statement-ending semicolons, indentation, keyword-led lines.
+    """
+    words = len(text.split())
+    markers = len(_CODE_MARKER_RE.findall(text))
+    if markers < 3 or markers / max(words, 1) < 0.3:
+        return False
+    return sum(bool(pattern.search(text)) for pattern in _CODE_STRUCTURE_RES) >= 2
+
+
+def is_dot_leader_list(text) -> bool:
+    """Tables of contents/figures: 'Figure 2.1 Harbour ........ 45'"""
+    leaders = _DOT_LEADER_RE.findall(text)
+    return len(leaders) >= 2 and len(_DOT_LEADER_RE.sub('', text).split()) <= len(leaders) * 8
+
+
+PASSTHROUGH_RULES: Dict[str, Callable[[str], bool]] = {
+    'punctuation': is_punctuation,
+    'number': is_number,
+    'url': is_url,
+    'isbn': is_isbn,
+    'code': is_code,
+    'dot_leaders': is_dot_leader_list,
+}
+
+
+def passthrough_rule(text, rules: Iterable[str] = PASSTHROUGH_RULES) -> Optional[str]:
+    """Name of the first rule that marks text as not needing translation, else None"""
+    text = text.strip()
+    for name in rules:
+        if PASSTHROUGH_RULES[name](text):
+            return name
+    return None
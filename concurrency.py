@@ -0,0 +1,151 @@
+"""
+Adaptive in-flight limit for LLM requests (AIMD)
+- Additive increase while per-token latency stays near the best seen and throughput keeps rising
+- Multiplicative decrease on failures/timeouts or when latency inflates (requests queueing inside the server)
+- Every adjustment is logged so the settled value is visible
+- Hedging: a request slower than a percentile of this run's latencies gets one duplicate, within a budget
+"""
+
+import time
+import asyncio
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+
+class AdaptiveLimiter:
+    """Async context manager limiting concurrent requests to a limit that moves at runtime
+
+    With min_limit == max_limit it is a plain semaphore.
+    """
+
+    def __init__(self, initial: int, min_limit: int = 1, max_limit: int = 16,
+                 min_window: int = 4, backoff: float = 0.7, latency_tolerance: float = 1.5,
+                 plateau_gain: float = 1.05, hold_windows: int = 3):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(max(initial, self.min_limit), self.max_limit)
+        self.min_window = min_window  # Completed requests per decision (at least `limit`)
+        self.backoff = backoff  # Multiplicative decrease factor
+        self.latency_tolerance = latency_tolerance  # Allowed per-token latency over the baseline
+        self.plateau_gain = plateau_gain  # Throughput gain an increase must buy to be kept
+        self.hold_windows = hold_windows  # Windows to wait before probing upward again after a plateau
+        self.in_flight = 0
+        self.adjustments = 0
+
+        self._cond = asyncio.Condition()
+        self._samples: List[Tuple[float, int]] = []  # (latency, tokens)
+        self._window_start = time.perf_counter()
+        self._baseline: Optional[float] = None  # Best per-token latency seen
+        self._last_throughput = 0.0
+        self._last_increase = False
+        self._hold = 0
+
+    @property
+    def adaptive(self) -> bool:
+        return self.min_limit < self.max_limit
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def record(self, latency: float, tokens: int):
+        """One successful request: wall-clock latency and generated tokens"""
+        if not self.adaptive:
+            return
+        self._samples.append((latency, max(tokens, 1)))
+        if len(self._samples) < max(self.min_window, self.limit):
+            return
+
+        elapsed = max(time.perf_counter() - self._window_start, 1e-6)
+        total_tokens = sum(tokens for _, tokens in self._samples)
+        per_token = sum(latency for latency, _ in self._samples) / total_tokens
+        throughput = total_tokens / elapsed
+        self._samples.clear()
+        self._window_start = time.perf_counter()
+
+        if self._baseline is None or per_token < self._baseline or self.limit == self.min_limit:
+            # At the floor there is no concurrency left to blame, so a slower window is the new normal
+            # (e.g. shorter chunks with more fixed overhead per token)
+            self._baseline = per_token
+
+        detail = (f"토큰당 지연 {per_token * 1000:.1f}ms (기준 {self._baseline * 1000:.1f}ms), "
+                  f"처리량 {throughput:.1f} 토큰/초")
+        if per_token > self._baseline * self.latency_tolerance:
+            self._decrease(f"지연 증가, {detail}")
+        elif self._last_increase and throughput < self._last_throughput * self.plateau_gain:
+            # The last increase bought nothing: the server is saturated
+            self._hold = self.hold_windows
+            self._set_limit(self.limit - 1, f"처리량 정체, {detail}")
+        elif self._hold > 0:
+            self._hold -= 1
+            self._last_increase = False
+        else:
+            self._last_increase = self._set_limit(self.limit + 1, detail)
+        self._last_throughput = throughput
+
+    def record_failure(self):
+        """A failed or timed-out request: back off immediately"""
+        if not self.adaptive:
+            return
+        self._samples.clear()
+        self._window_start = time.perf_counter()
+        self._decrease("요청 실패")
+
+    def _decrease(self, reason):
+        self._hold = self.hold_windows
+        self._set_limit(int(self.limit * self.backoff), reason)
+
+    def _set_limit(self, limit, reason) -> bool:
+        limit = min(max(limit, self.min_limit), self.max_limit)
+        self._last_increase = False
+        if limit == self.limit:
+            return False
+        print(f"동시 요청 수 조정: {self.limit} → {limit} ({reason})")
+        increased = limit > self.limit
+        self.limit = limit
+        self.adjustments += 1
+        return increased
+
+
+class HedgePolicy:
+    """When a slow request gets a duplicate, and how many duplicates a run may add
+
+    Latency is tracked per input token so long chunks are not mistaken for stragglers.
+    """
+
+    def __init__(self, percentile: float = 0.95, min_samples: int = 20, min_delay: float = 2.0,
+                 max_ratio: float = 0.1, history: int = 512):
+        self.percentile = min(max(percentile, 0.0), 1.0)
+        self.min_samples = max(1, min_samples)  # Completed requests before any hedging
+        self.min_delay = min_delay  # Never hedge sooner than this (seconds)
+        self.max_ratio = max_ratio  # Duplicates allowed per primary request
+        self.requests = 0
+        self.hedges = 0
+        self.wins = 0  # Duplicates that finished first
+        self._samples: Deque[float] = deque(maxlen=history)  # Seconds per input token
+
+    def observe(self, latency: float, tokens: int):
+        """One successful request: wall-clock latency from the first send and its input size"""
+        self._samples.append(latency / max(tokens, 1))
+
+    def delay(self, tokens: int) -> Optional[float]:
+        """Seconds to wait before duplicating a request of this size; None until enough samples"""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        per_token = ordered[min(int(len(ordered) * self.percentile), len(ordered) - 1)]
+        return max(self.min_delay, per_token * max(tokens, 1))
+
+    def try_hedge(self) -> bool:
+        """Take one duplicate from the budget"""
+        if self.hedges + 1 > self.requests * self.max_ratio:
+            return False
+        self.hedges += 1
+        return True
@@ -1,88 +1,571 @@
 import os
-import ebooklib
-from ebooklib import epub
-from bs4 import BeautifulSoup
+import re
+import copy
+import math
+import zipfile
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.element import PreformattedString
+import lxml.etree
+import lxml.html
 import pdfplumber
-import nltk
-from typing import List, Tuple
+from typing import List, Optional, Tuple, Dict, Iterator
+import segmentation
+from epub_zip import ZipEpub
+from pdf_cleanup import RunningLineStripper, extract_page_lines, stitch_pages
+from segmentation import CJK_CHAR_RE, split_sentences
 
-# Download NLTK data (needed for first run)
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+# 'lxml-raw' skips BeautifulSoup and reads the text straight from lxml's tree
+HTML_BACKENDS = ('html.parser', 'lxml', 'lxml-raw')
 
-def extract_text_from_html(html_content):
+def extract_text_from_html(html_content, backend='html.parser'):
     """Extract text from HTML content"""
-    soup = BeautifulSoup(html_content, 'html.parser')
+    if backend == 'lxml-raw':
+        # lxml refuses str input that carries an XML encoding declaration
+        if isinstance(html_content, str):
+            html_content = html_content.encode('utf-8')
+        if not html_content.strip():
+            return ""
+        document = lxml.html.document_fromstring(html_content)
+        # Same text as BeautifulSoup's get_text() minus what a reader never sees (<title>, CSS, JS)
+        lxml.etree.strip_elements(document, 'head', 'style', 'script', with_tail=False)
+        return document.text_content()
+    
+    if backend not in HTML_BACKENDS:
+        raise ValueError(f"Unsupported HTML backend: {backend}")
+    soup = BeautifulSoup(html_content, backend)
     return soup.get_text()
 
-def split_text_into_chunks(text, max_chunk_size=1000):
-    """Split text into manageable chunks for processing"""
-    sentences = nltk.sent_tokenize(text)
+# Keeps a single /api/generate call around 1000 English characters
+DEFAULT_MAX_CHUNK_TOKENS = 300
+
+def estimate_tokens(text):
+    """Offline per-script token estimate: 1 per CJK character, ~4 characters per token otherwise"""
+    cjk = len(CJK_CHAR_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+def _hard_split(sentence, max_tokens, token_estimator):
+    """Split a sentence that alone exceeds the budget, at word boundaries where possible"""
+    pieces = []
+    current = ""
+    
+    for word in sentence.split():
+        candidate = f"{current} {word}" if current else word
+        if token_estimator(candidate) <= max_tokens:
+            current = candidate
+            continue
+        
+        if current:
+            pieces.append(current)
+            current = ""
+        if token_estimator(word) <= max_tokens:
+            current = word
+            continue
+        
+        # No spaces to split on (CJK, long URLs): cut into equal slices
+        slice_count = math.ceil(token_estimator(word) / max_tokens)
+        size = math.ceil(len(word) / slice_count)
+        for start in range(0, len(word), size):
+            part = word[start:start + size]
+            if token_estimator(part) > max_tokens and len(part) > 1:
+                pieces.extend(_hard_split(part, max_tokens, token_estimator))
+            else:
+                pieces.append(part)
+    
+    if current:
+        pieces.append(current)
+    return pieces
+
+def split_text_into_chunks(text, max_tokens=DEFAULT_MAX_CHUNK_TOKENS, token_estimator=estimate_tokens,
+                           segmenter='auto'):
+    """Pack sentences into chunks of at most max_tokens estimated tokens
+    
+    token_estimator maps a string to a token count; it must be picklable
+    (a module-level function) when the parser runs with worker processes.
+    """
     chunks = []
-    current_chunk = ""
+    current = ""
     
-    for sentence in sentences:
-        if len(current_chunk) + len(sentence) <= max_chunk_size:
-            current_chunk += sentence + " "
+    for sentence in split_sentences(text, segmenter):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        
+        candidate = f"{current} {sentence}" if current else sentence
+        if token_estimator(candidate) <= max_tokens:
+            current = candidate
+            continue
+        
+        if current:
+            chunks.append(current)
+            current = ""
+        if token_estimator(sentence) <= max_tokens:
+            current = sentence
         else:
-            chunks.append(current_chunk.strip())
-            current_chunk = sentence + " "
+            chunks.extend(_hard_split(sentence, max_tokens, token_estimator))
     
-    if current_chunk:
-        chunks.append(current_chunk.strip())
+    if current:
+        chunks.append(current)
     
     return chunks
 
+# 'blocks' chunks by block element and keeps a node path per chunk for write-back
+STRUCTURES = ('flat', 'blocks')
+# Elements that start a new block; everything else (em, a, span, br, ...) is inline text of its block
+BLOCK_TAGS = [
+    'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'blockquote', 'div', 'section', 'article', 'aside',
+    'header', 'footer', 'nav', 'main', 'figure', 'figcaption', 'ul', 'ol', 'dl', 'dt', 'dd', 'table',
+    'caption', 'thead', 'tbody', 'tfoot', 'tr', 'td', 'th', 'pre', 'address', 'hr', 'body', 'html',
+]
+# Never reader-visible text, or text whose links and layout must survive as written
+# (the navigation document's table of contents, code listings)
+_SKIPPED_TAGS = frozenset({'head', 'title', 'style', 'script', 'noscript', 'template', 'nav', 'pre'})
+# Node path suffix for one run of inline content inside an element that also holds blocks
+_RUN_SEPARATOR = '~'
+# Inline elements travel through the model as numbered markers: <1>text</1> for elements around
+# text (links, emphasis), <1/> for <br> and elements without text (images, empty anchors)
+_MARKER_RE = re.compile(r'<(/?)(\d+)(/?)>')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def _index_nodes(soup) -> Tuple[Dict[str, object], Dict[int, str]]:
+    """Node path <-> element maps for every element, built in one document-order pass"""
+    by_path = {}
+    paths = {id(soup): ""}
+    counters = {}
+    
+    for element in soup.find_all(True):
+        parent_key = id(element.parent)
+        siblings = counters.setdefault(parent_key, {})
+        siblings[element.name] = siblings.get(element.name, 0) + 1
+        path = f"{paths[parent_key]}/{element.name}[{siblings[element.name]}]"
+        paths[id(element)] = path
+        by_path[path] = element
+    
+    return by_path, paths
+
+def _is_inline(node) -> bool:
+    """Text, or an inline element with no block inside it"""
+    if isinstance(node, NavigableString):
+        return True
+    return node.name not in BLOCK_TAGS and node.name not in _SKIPPED_TAGS and node.find(BLOCK_TAGS) is None
+
+def _inline_runs(element) -> List[list]:
+    """Children of element grouped into runs of consecutive inline nodes (blocks split the runs)"""
+    runs, current = [], []
+    for child in element.contents:
+        if _is_inline(child):
+            current.append(child)
+        elif current:
+            runs.append(current)
+            current = []
+    if current:
+        runs.append(current)
+    return runs
+
+def _element_runs(element) -> List[list]:
+    """Runs of a block: all children when they are all inline, else its inline runs"""
+    if element.name and element.contents and all(_is_inline(child) for child in element.contents):
+        return [list(element.contents)]
+    return _inline_runs(element)
+
+def _encode_run(run) -> Tuple[str, List[Tag]]:
+    """Run as text with numbered markers, and the marked elements (marker n is elements[n - 1])"""
+    elements = []
+    
+    def encode(nodes) -> str:
+        parts = []
+        for node in nodes:
+            # Comments, CDATA, doctypes etc. are PreformattedStrings, never reader-visible text
+            if isinstance(node, PreformattedString):
+                continue
+            if isinstance(node, NavigableString):
+                parts.append(str(node))
+                continue
+            elements.append(node)
+            number = len(elements)
+            if not node.get_text().strip():
+                parts.append(f"<{number}/>")
+            else:
+                parts.append(f"<{number}>{encode(node.contents)}</{number}>")
+        return "".join(parts)
+    
+    return _WHITESPACE_RE.sub(' ', encode(run)), elements
+
+def _decode_run(soup, translated, elements) -> Optional[list]:
+    """Nodes rebuilt from a translation with markers, or None if the markers don't nest properly"""
+    top: list = []
+    stack = [(None, top)]  # (marker number, children being built)
+    used = set()
+    position = 0
+    
+    def add_text(text):
+        text = _WHITESPACE_RE.sub(' ', text)
+        if text:
+            stack[-1][1].append(NavigableString(text))
+    
+    for match in _MARKER_RE.finditer(translated):
+        add_text(translated[position:match.start()])
+        position = match.end()
+        closing, number, void = match.group(1), int(match.group(2)), match.group(3)
+        if closing:
+            if stack[-1][0] != number:
+                return None
+            stack.pop()
+            continue
+        if not 1 <= number <= len(elements) or number in used:
+            return None
+        used.add(number)
+        original = elements[number - 1]
+        if void:
+            stack[-1][1].append(copy.copy(original))
+            continue
+        element = soup.new_tag(original.name, attrs=dict(original.attrs))
+        stack[-1][1].append(element)
+        stack.append((number, element))
+    add_text(translated[position:])
+    if len(stack) > 1:
+        return None
+    return top
+
+def block_plain_text(text) -> str:
+    """Block text without its markers, for plain-text output (line breaks and images become newlines)"""
+    return _MARKER_RE.sub(lambda match: "\n" if match.group(3) else "", text)
+
+def extract_blocks(html_content) -> List[Tuple[str, str]]:
+    """Extract (node path, text) for every run of inline text, in document order
+    
+    An element whose children are all inline is one block at its own path. In an element that
+    mixes text with nested blocks (li > text + ul, blockquote > text + p, bare body text), each
+    run of inline content is a block at '<element path>~<run index>'. Inline elements inside a
+    block are kept as numbered markers so apply_block_translations can put them back.
+    """
+    # html.parser keeps the document as written, so paths resolve again at save time
+    soup = BeautifulSoup(html_content, 'html.parser')
+    _, paths = _index_nodes(soup)
+    blocks = []
+    
+    def add(path, run):
+        text, _ = _encode_run(run)
+        # Markers alone (an image, a line break) are nothing to translate
+        if _MARKER_RE.sub('', text).strip():
+            blocks.append((path, text.strip()))
+    
+    def walk(element):
+        if element.name in _SKIPPED_TAGS:
+            return
+        path = paths[id(element)]
+        # The document root never gets a whole-element path: an empty path means flat mode
+        if element is not soup and element.contents and all(_is_inline(child) for child in element.contents):
+            add(path, element.contents)
+            return
+        
+        run, run_index = [], 0
+        for child in element.contents:
+            if _is_inline(child):
+                run.append(child)
+                continue
+            if run:
+                add(f"{path}{_RUN_SEPARATOR}{run_index}", run)
+                run, run_index = [], run_index + 1
+            walk(child)
+        if run:
+            add(f"{path}{_RUN_SEPARATOR}{run_index}", run)
+    
+    walk(soup)
+    return blocks
+
+def apply_block_translations(html_content, translations: Dict[str, str]) -> str:
+    """Write translations into the runs recorded by extract_blocks, leaving the rest untouched
+    
+    Links, emphasis and line breaks come back from their markers with their original attributes.
+    If the model mangled the markers, the run gets the plain translation without them.
+    """
+    soup = BeautifulSoup(html_content, 'html.parser')
+    nodes, _ = _index_nodes(soup)
+    nodes[""] = soup  # Runs of bare text at the top level
+    
+    # Resolve every run before replacing any: replacing changes the element's children
+    runs = []
+    for path, translated in translations.items():
+        if not translated.strip():
+            continue
+        element_path, separator, run_index = path.partition(_RUN_SEPARATOR)
+        node = nodes.get(element_path)
+        if node is None:
+            continue
+        element_runs = _element_runs(node) if not separator else _inline_runs(node)
+        index = int(run_index) if run_index.isdigit() else 0
+        if (not separator or run_index.isdigit()) and index < len(element_runs):
+            runs.append((element_runs[index], translated.strip()))
+    
+    for run, translated in runs:
+        text, elements = _encode_run(run)
+        rebuilt = _decode_run(soup, translated, elements)
+        if rebuilt is None:
+            rebuilt = [NavigableString(_WHITESPACE_RE.sub(' ', _MARKER_RE.sub('', translated)))]
+        # Keep the run's surrounding whitespace so it stays apart from the neighbouring blocks
+        if text[:1].isspace():
+            rebuilt.insert(0, NavigableString(' '))
+        if text[-1:].isspace():
+            rebuilt.append(NavigableString(' '))
+        anchor = run[0]
+        for new_node in rebuilt:
+            anchor.insert_before(new_node)
+        for node in run:
+            if not isinstance(node, PreformattedString):  # Comments stay where they were
+                node.extract()
+    
+    return str(soup)
+
+def _parse_epub_document(content, backend='html.parser', chunker=split_text_into_chunks,
+                         structure='flat') -> List[Tuple[str, str]]:
+    """Extract and chunk one EPUB document into (node path, chunk) pairs
+    
+    Runs in a worker process in parallel mode. The node path is empty in
+    flat mode, where the whole document is one text.
+    """
+    if structure == 'blocks':
+        return [
+            (path, chunk)
+            for path, text in extract_blocks(content.decode('utf-8'))
+            for chunk in chunker(text)
+        ]
+    
+    html = content if backend == 'lxml-raw' else content.decode('utf-8')
+    text = extract_text_from_html(html, backend)
+    if not text.strip():  # Ignore empty content
+        return []
+    return [("", chunk) for chunk in chunker(text)]
+
+def block_chunk_id(item_id, path):
+    """Chunk ID for a block: '<document id>#<node path>' (plain document ID in flat mode)"""
+    return f"{item_id}#{path}" if path else item_id
+
+def split_chunk_id(chunk_id) -> Tuple[object, str]:
+    """Inverse of block_chunk_id: (document id, node path or '')"""
+    if isinstance(chunk_id, str) and '#' in chunk_id:
+        item_id, path = chunk_id.split('#', 1)
+        return item_id, path
+    return chunk_id, ""
+
+def _parse_epub_entries(file_path, entries, backend='html.parser', chunker=split_text_into_chunks,
+                        structure='flat') -> List[List[Tuple[str, str]]]:
+    """Parse a batch of EPUB documents in a worker process that opens the archive itself"""
+    with zipfile.ZipFile(file_path) as archive:
+        return [_parse_epub_document(archive.read(entry), backend, chunker, structure) for entry in entries]
+
+def _extract_pdf_page_range(file_path, start, end, chunker=split_text_into_chunks) -> List[Tuple[int, List[str]]]:
+    """Extract and chunk pages [start, end) in a worker process that opens the PDF itself"""
+    pages = []
+    with pdfplumber.open(file_path) as pdf:
+        for i in range(start, end):
+            text = pdf.pages[i].extract_text()
+            pages.append((i + 1, chunker(text) if text else []))
+    return pages
+
+def _extract_pdf_page_lines(file_path, start, end) -> List[Tuple[int, float, List[Tuple[str, float]]]]:
+    """Extract positioned lines of pages [start, end) for header/footer stripping"""
+    with pdfplumber.open(file_path) as pdf:
+        return [(i + 1, *extract_page_lines(pdf.pages[i])) for i in range(start, end)]
+
+# Below this many pages/documents, process start-up costs more than it saves
+MIN_PARALLEL_PDF_PAGES = 8
+MIN_PARALLEL_EPUB_DOCUMENTS = 16
+
+# Bump when extraction/chunking output changes so stale parse-cache entries are ignored
+PARSER_VERSION = 6
+
 class EbookParser:
     """Class for parsing ebook files"""
     
-    def __init__(self):
-        pass
+    def __init__(self, workers=1, html_backend='html.parser',
+                 max_chunk_tokens=DEFAULT_MAX_CHUNK_TOKENS, token_estimator=estimate_tokens,
+                 segmenter='auto', structure='flat', cache=None, strip_running_lines=True):
+        # Number of worker processes for page/document extraction (None = all cores)
+        self.workers = workers or os.cpu_count() or 1
+        if html_backend not in HTML_BACKENDS:
+            raise ValueError(f"Unsupported HTML backend: {html_backend}")
+        self.html_backend = html_backend
+        if segmenter not in segmentation.SEGMENTERS:
+            raise ValueError(f"Unsupported segmenter: {segmenter}")
+        self.segmenter = segmenter
+        # 'blocks' always parses with html.parser so node paths match at save time
+        if structure not in STRUCTURES:
+            raise ValueError(f"Unsupported structure mode: {structure}")
+        self.structure = structure
+        # A partial of a module-level function, so it can be shipped to worker processes
+        self.chunker = functools.partial(
+            split_text_into_chunks, max_tokens=max_chunk_tokens, token_estimator=token_estimator,
+            segmenter=segmenter
+        )
+        # Optional parse_cache.ParseCache; re-runs of the same book skip parsing entirely
+        self.cache = cache
+        # PDF: drop running headers/footers/page numbers and stitch sentences across pages
+        self.strip_running_lines = strip_running_lines
+        self.pdf_cleanup_report = None
+    
+    def settings_fingerprint(self) -> str:
+        """Every setting that changes the chunk list (worker count doesn't)"""
+        estimator = self.chunker.keywords['token_estimator']
+        # 'auto' segmentation depends on whether the Punkt data is installed
+        punkt = self.segmenter != 'regex' and segmentation.punkt_available()
+        return "|".join(str(value) for value in (
+            PARSER_VERSION, self.html_backend, self.structure, self.segmenter, punkt, self.strip_running_lines,
+            self.chunker.keywords['max_tokens'],
+            f"{getattr(estimator, '__module__', '')}.{getattr(estimator, '__qualname__', repr(estimator))}",
+        ))
     
     def parse_epub(self, file_path) -> List[Tuple[str, str]]:
         """Parse EPUB file"""
-        book = epub.read_epub(file_path)
-        chapters = []
-        
-        for item in book.get_items():
-            if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                content = item.get_content().decode('utf-8')
-                text = extract_text_from_html(content)
-                if text.strip():  # Ignore empty content
-                    text_chunks = split_text_into_chunks(text)
-                    for chunk in text_chunks:
-                        # Store chapter ID and content
-                        chapters.append((item.get_id(), chunk))
-        
-        return chapters
+        return list(self.iter_epub_chunks(file_path))
     
     def parse_pdf(self, file_path) -> List[Tuple[int, str]]:
         """Parse PDF file"""
-        chapters = []
+        return list(self.iter_pdf_chunks(file_path))
+    
+    def iter_epub_chunks(self, file_path) -> Iterator[Tuple[str, str]]:
+        """Yield EPUB chunks document by document, in spine order, as they are extracted"""
+        # Only XHTML documents are decompressed; images and fonts are never read
+        with ZipEpub(file_path) as book:
+            documents = book.documents()
+            
+            if self.workers > 1 and len(documents) >= MIN_PARALLEL_EPUB_DOCUMENTS:
+                yield from self._iter_epub_chunks_parallel(file_path, documents)
+                return
+            
+            for item in documents:
+                for path, chunk in _parse_epub_document(
+                    book.read(item), self.html_backend, self.chunker, self.structure
+                ):
+                    # Chapter ID (plus node path in block mode) and content
+                    yield block_chunk_id(item.get_id(), path), chunk
+    
+    def _process_pool(self, workers) -> ProcessPoolExecutor:
+        """Worker pool that loads the segmentation model once per process"""
+        # spawn: forking a process that already runs Qt/asyncio threads is unsafe
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=segmentation.preload,
+            initargs=(self.segmenter,)
+        )
+    
+    def _iter_epub_chunks_parallel(self, file_path, documents) -> Iterator[Tuple[str, str]]:
+        """Parse documents across worker processes and reassemble them in spine order"""
+        # Workers read their own entries, so no document is decompressed here ahead of its turn;
+        # several documents per task amortize opening the archive and the pickling/IPC overhead
+        batches = [documents[i:i + 8] for i in range(0, len(documents), 8)]
+        executor = self._process_pool(min(self.workers, len(documents)))
+        try:
+            parsed = executor.map(
+                _parse_epub_entries,
+                [file_path] * len(batches),
+                [[item.href for item in batch] for batch in batches],
+                [self.html_backend] * len(batches),
+                [self.chunker] * len(batches),
+                [self.structure] * len(batches)
+            )
+            for batch, batch_chunks in zip(batches, parsed):
+                for item, chunks in zip(batch, batch_chunks):
+                    for path, chunk in chunks:
+                        yield block_chunk_id(item.get_id(), path), chunk
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def iter_pdf_chunks(self, file_path) -> Iterator[Tuple[int, str]]:
+        """Yield PDF chunks page by page as they are extracted"""
+        if self.strip_running_lines:
+            yield from self._iter_cleaned_pdf_chunks(file_path)
+            return
         
         with pdfplumber.open(file_path) as pdf:
-            for i, page in enumerate(pdf.pages):
-                text = page.extract_text()
-                if text:
-                    text_chunks = split_text_into_chunks(text)
-                    for chunk in text_chunks:
-                        # Store page number and content
-                        chapters.append((i + 1, chunk))
+            page_count = len(pdf.pages)
+            if self.workers <= 1 or page_count < MIN_PARALLEL_PDF_PAGES:
+                for i, page in enumerate(pdf.pages):
+                    text = page.extract_text()
+                    if text:
+                        for chunk in self.chunker(text):
+                            # Page number and content
+                            yield i + 1, chunk
+                return
         
-        return chapters
+        for page_number, chunks in self._iter_pdf_shards(file_path, page_count, _extract_pdf_page_range, self.chunker):
+            for chunk in chunks:
+                yield page_number, chunk
     
-    def parse_ebook(self, file_path) -> List[Tuple[str, str]]:
-        """Select appropriate parser based on ebook file format"""
+    def _iter_cleaned_pdf_chunks(self, file_path) -> Iterator[Tuple[int, str]]:
+        """Strip repeated headers/footers and page numbers, stitch pages, then chunk"""
+        stripper = RunningLineStripper(token_estimator=self.chunker.keywords['token_estimator'])
+        self.pdf_cleanup_report = stripper
+        
+        for page_number, text in stitch_pages(stripper.strip(self._iter_pdf_page_lines(file_path))):
+            for chunk in self.chunker(text):
+                yield page_number, chunk
+    
+    def _iter_pdf_page_lines(self, file_path):
+        """Positioned lines per page, extracted serially or across worker processes"""
+        with pdfplumber.open(file_path) as pdf:
+            page_count = len(pdf.pages)
+            if self.workers <= 1 or page_count < MIN_PARALLEL_PDF_PAGES:
+                for i, page in enumerate(pdf.pages):
+                    yield (i + 1, *extract_page_lines(page))
+                return
+        
+        yield from self._iter_pdf_shards(file_path, page_count, _extract_pdf_page_lines)
+    
+    def _iter_pdf_shards(self, file_path, page_count, extract, *extra_args) -> Iterator:
+        """Shard page ranges across worker processes and yield per-page results in page order"""
+        workers = min(self.workers, page_count)
+        
+        # Small shards keep workers balanced and let the first pages stream out early
+        shard_size = max(1, min(16, page_count // (workers * 4)))
+        starts = list(range(0, page_count, shard_size))
+        ends = [min(start + shard_size, page_count) for start in starts]
+        extra = [[arg] * len(starts) for arg in extra_args]
+        
+        executor = self._process_pool(workers)
+        try:
+            # map() yields shard results in submission order, i.e. page order
+            for pages in executor.map(extract, [file_path] * len(starts), starts, ends, *extra):
+                yield from pages
+        finally:
+            # Don't keep extracting pages nobody will consume (e.g. cancelled job)
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def iter_chunks(self, file_path) -> Iterator[Tuple[str, str]]:
+        """Stream chunks in reading order so translation can start before parsing finishes"""
         ext = os.path.splitext(file_path)[1].lower()
         
         # 마지막으로 파싱한 파일 경로 저장
         self.last_parsed_file = file_path
             
         if ext == '.epub':
-            return self.parse_epub(file_path)
+            chunks = self.iter_epub_chunks
         elif ext == '.pdf':
-            return self.parse_pdf(file_path)
+            chunks = self.iter_pdf_chunks
         else:
             raise ValueError(f"Unsupported file format: {ext}")
+        
+        if self.cache is None:
+            return chunks(file_path)
+        
+        key = self.cache.key_for(file_path, self.settings_fingerprint())
+        cached = self.cache.get(key)
+        if cached is not None:
+            return iter(cached)
+        return self._iter_and_cache(chunks(file_path), key)
+    
+    def _iter_and_cache(self, chunks, key) -> Iterator[Tuple[str, str]]:
+        """Pass chunks through and store the full list once parsing completes"""
+        parsed = []
+        for chunk in chunks:
+            parsed.append(chunk)
+            yield chunk
+        # Only reached when fully consumed, so partial parses are never cached
+        self.cache.put(key, parsed)
+    
+    def parse_ebook(self, file_path) -> List[Tuple[str, str]]:
+        """Select appropriate parser based on ebook file format"""
+        return list(self.iter_chunks(file_path))
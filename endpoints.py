@@ -0,0 +1,200 @@
+"""
+Load balancing across several LLM servers
+- Each endpoint has a concurrency weight (max requests in flight on that server)
+- Requests go to the least-loaded healthy endpoint
+- Endpoints failing repeatedly leave the rotation until a periodic health probe succeeds
+- Circuit breaker: while no endpoint is healthy, requests wait (up to open_timeout) for a probe to succeed
+  instead of hammering a server that is down
+- Per-endpoint request/token/throughput counters for the end-of-run report
+"""
+
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AbstractSet, AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Tuple
+
+import httpx
+
+from retry_policy import classify_error, counts_against_server
+
+DEFAULT_PROBE_INTERVAL = 10.0  # Seconds
+DEFAULT_FAILURE_THRESHOLD = 2  # Consecutive failures before an endpoint leaves the rotation
+DEFAULT_OPEN_TIMEOUT = 300.0  # Seconds a request waits for any endpoint to come back
+DEFAULT_PROBE_PATH = "/api/version"  # Ollama
+
+
+class CircuitOpenError(RuntimeError):
+    """No endpoint came back within the pool's open_timeout"""
+
+
+def parse_endpoints(text: str, default_weight: int) -> List[Tuple[str, int]]:
+    """'http://a:11434*4, http://b:11434' -> [(url, weight)]; weight defaults to default_weight"""
+    endpoints = []
+    for part in text.replace(";", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        url, _, weight = part.partition("*")
+        endpoints.append((url.strip().rstrip("/"), int(weight) if weight.strip().isdigit() else default_weight))
+    return endpoints
+
+
+@dataclass
+class Endpoint:
+    """One server and its counters"""
+    url: str
+    weight: int
+    healthy: bool = True
+    in_flight: int = 0
+    consecutive_failures: int = 0
+    requests: int = 0
+    failures: int = 0
+    tokens: int = 0
+    busy_seconds: float = 0.0  # Wall time with at least one request in flight
+    _busy_since: float = 0.0
+
+    @property
+    def load(self) -> float:
+        return self.in_flight / self.weight
+
+    @property
+    def throughput(self) -> float:
+        """Generated tokens per busy second"""
+        return self.tokens / self.busy_seconds if self.busy_seconds else 0.0
+
+    def reset_counters(self):
+        self.requests = self.failures = self.tokens = 0
+        self.busy_seconds = 0.0
+        self._busy_since = time.perf_counter() if self.in_flight else 0.0
+
+
+class EndpointPool:
+    """Routes requests to endpoints and tracks their health"""
+
+    def __init__(self, endpoints: Iterable[Tuple[str, int]],
+                 client_for: Callable[[str], Awaitable[httpx.AsyncClient]],
+                 probe_interval: float = DEFAULT_PROBE_INTERVAL,
+                 failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 open_timeout: float = DEFAULT_OPEN_TIMEOUT,
+                 probe_path: str = DEFAULT_PROBE_PATH):
+        self.endpoints = [Endpoint(url, max(1, weight)) for url, weight in endpoints]
+        if not self.endpoints:
+            raise ValueError("at least one endpoint is required")
+        self.client_for = client_for
+        self.probe_interval = probe_interval
+        self.failure_threshold = failure_threshold
+        self.open_timeout = open_timeout
+        self.probe_path = probe_path
+        self.circuit_opens = 0
+        self._cond = asyncio.Condition()
+        self._probe_task: Optional[asyncio.Task] = None
+
+    @property
+    def total_weight(self) -> int:
+        return sum(endpoint.weight for endpoint in self.endpoints)
+
+    @property
+    def circuit_open(self) -> bool:
+        return not any(endpoint.healthy for endpoint in self.endpoints)
+
+    def _pick(self, avoid: AbstractSet[str] = frozenset()) -> Optional[Endpoint]:
+        """Least-loaded healthy endpoint with a free slot; URLs in avoid only when no other endpoint has one"""
+        candidates = [endpoint for endpoint in self.endpoints
+                      if endpoint.healthy and endpoint.in_flight < endpoint.weight]
+        preferred = [endpoint for endpoint in candidates if endpoint.url not in avoid]
+        return min(preferred or candidates, key=lambda endpoint: endpoint.load, default=None)
+
+    @asynccontextmanager
+    async def slot(self, avoid: AbstractSet[str] = frozenset()) -> AsyncIterator[Endpoint]:
+        """Hold a request slot on the chosen endpoint; an exception inside counts as that endpoint failing
+        (except client errors and runaway generations, which say nothing about the server's health)
+
+        Raises CircuitOpenError if no endpoint is healthy for open_timeout seconds.
+        """
+        async with self._cond:
+            try:
+                await asyncio.wait_for(self._cond.wait_for(lambda: self._pick(avoid) is not None), self.open_timeout)
+            except asyncio.TimeoutError:
+                raise CircuitOpenError(f"{self.open_timeout:.0f}초 동안 응답하는 서버가 없습니다")
+            endpoint = self._pick(avoid)
+            if endpoint.in_flight == 0:
+                endpoint._busy_since = time.perf_counter()
+            endpoint.in_flight += 1
+            endpoint.requests += 1
+
+        try:
+            yield endpoint
+        except Exception as e:
+            self._record_failure(endpoint, e)
+            raise
+        else:
+            endpoint.consecutive_failures = 0
+        finally:
+            async with self._cond:
+                endpoint.in_flight -= 1
+                if endpoint.in_flight == 0:
+                    endpoint.busy_seconds += time.perf_counter() - endpoint._busy_since
+                self._cond.notify_all()
+
+    def _record_failure(self, endpoint: Endpoint, error: Exception):
+        endpoint.failures += 1
+        if not counts_against_server(classify_error(error)):
+            return
+        endpoint.consecutive_failures += 1
+        if endpoint.healthy and endpoint.consecutive_failures >= self.failure_threshold:
+            endpoint.healthy = False
+            reason = f"HTTP {error.response.status_code}" if isinstance(error, httpx.HTTPStatusError) else error
+            print(f"엔드포인트 제외: {endpoint.url} (연속 실패 {endpoint.consecutive_failures}회: {reason})")
+            if self.circuit_open:
+                self.circuit_opens += 1
+                print(f"응답하는 서버가 없어 요청을 멈춥니다 ({self.probe_interval:g}초마다 확인)")
+            self._ensure_probing()
+
+    def _ensure_probing(self):
+        if any(not endpoint.healthy for endpoint in self.endpoints) and (
+                self._probe_task is None or self._probe_task.done()):
+            self._probe_task = asyncio.get_running_loop().create_task(self._probe_loop())
+
+    async def _probe_loop(self):
+        """Probe unhealthy endpoints until all of them are back"""
+        while any(not endpoint.healthy for endpoint in self.endpoints):
+            await asyncio.sleep(self.probe_interval)
+            for endpoint in self.endpoints:
+                if not endpoint.healthy and await self._probe(endpoint):
+                    if self.circuit_open:
+                        print("서버가 응답해 요청을 다시 보냅니다")
+                    endpoint.healthy = True
+                    endpoint.consecutive_failures = 0
+                    print(f"엔드포인트 복귀: {endpoint.url}")
+                    async with self._cond:
+                        self._cond.notify_all()
+
+    async def _probe(self, endpoint: Endpoint) -> bool:
+        try:
+            client = await self.client_for(endpoint.url)
+            response = await client.get(self.probe_path, timeout=5.0)
+            return response.status_code == 200
+        except Exception:
+            return False
+
+    def reset_counters(self):
+        """Start of a run: zero the counters and resume probing endpoints left out by an earlier run"""
+        for endpoint in self.endpoints:
+            endpoint.reset_counters()
+        self.circuit_opens = 0
+        self._ensure_probing()
+
+    def report(self) -> List[str]:
+        """One line per endpoint"""
+        return [
+            f"{endpoint.url}: 요청 {endpoint.requests}개, 실패 {endpoint.failures}개, "
+            f"토큰 {endpoint.tokens}개, {endpoint.throughput:.1f} 토큰/초"
+            f"{'' if endpoint.healthy else ' (제외됨)'}"
+            for endpoint in self.endpoints
+        ]
+
+    async def close(self):
+        if self._probe_task and not self._probe_task.done():
+            self._probe_task.cancel()
+        self._probe_task = None
@@ -0,0 +1,107 @@
+"""
+Lazy, zip-level EPUB access
+- Reads only container.xml and the OPF package document up front
+- XHTML documents are decompressed on demand; images and fonts are never loaded
+- Saving streams untouched entries straight into the output zip
+"""
+
+import shutil
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+from urllib.parse import unquote
+from dataclasses import dataclass
+from typing import Dict, List
+
+DOCUMENT_MEDIA_TYPES = ('application/xhtml+xml', 'text/html')
+_CONTAINER_PATH = 'META-INF/container.xml'
+
+
+@dataclass
+class ManifestItem:
+    """One <item> of the OPF manifest"""
+    id: str
+    href: str  # Path inside the zip
+    media_type: str
+
+    def get_id(self) -> str:
+        return self.id
+
+    @property
+    def is_document(self) -> bool:
+        return self.media_type in DOCUMENT_MEDIA_TYPES
+
+
+class ZipEpub:
+    """EPUB opened as a zip archive"""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._zip = zipfile.ZipFile(file_path)
+        self.opf_path = self._find_opf()
+        self.manifest: Dict[str, ManifestItem] = {}
+        self.spine: List[str] = []
+        self._read_opf()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._zip.close()
+
+    def _find_opf(self) -> str:
+        """Package document path from META-INF/container.xml"""
+        root = ET.fromstring(self._zip.read(_CONTAINER_PATH))
+        for rootfile in root.iterfind('.//{*}rootfile'):
+            if rootfile.get('full-path'):
+                return rootfile.get('full-path')
+        raise ValueError(f"No rootfile in {_CONTAINER_PATH}")
+
+    def _read_opf(self):
+        root = ET.fromstring(self._zip.read(self.opf_path))
+        opf_dir = posixpath.dirname(self.opf_path)
+
+        for item in root.iterfind('.//{*}item'):
+            item_id, href = item.get('id'), item.get('href')
+            if not item_id or not href:
+                continue
+            path = posixpath.normpath(posixpath.join(opf_dir, unquote(href)))
+            self.manifest[item_id] = ManifestItem(item_id, path, item.get('media-type', ''))
+
+        for itemref in root.iterfind('.//{*}itemref'):
+            if itemref.get('idref') in self.manifest:
+                self.spine.append(itemref.get('idref'))
+
+    def documents(self) -> List[ManifestItem]:
+        """XHTML documents in spine order, followed by documents outside the spine"""
+        in_spine = set(self.spine)
+        ordered = [self.manifest[item_id] for item_id in self.spine if self.manifest[item_id].is_document]
+        ordered += [item for item in self.manifest.values() if item.is_document and item.id not in in_spine]
+        return ordered
+
+    def read(self, item: ManifestItem) -> bytes:
+        """Decompress one entry"""
+        return self._zip.read(item.href)
+
+    def write_patched(self, output_path, replacements: Dict[str, bytes], buffer_size=1024 * 1024):
+        """Copy the archive to output_path, replacing the given zip entries
+
+        Untouched entries are streamed through in fixed-size blocks, so large
+        images and fonts never sit in memory. Entry order and compression are
+        kept, which keeps 'mimetype' first and stored as the EPUB spec requires.
+        """
+        with zipfile.ZipFile(output_path, 'w') as out:
+            for info in self._zip.infolist():
+                target = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+                target.compress_type = info.compress_type
+                target.external_attr = info.external_attr
+
+                if info.filename in replacements:
+                    out.writestr(target, replacements[info.filename])
+                    continue
+
+                with self._zip.open(info) as src, out.open(target, 'w', force_zip64=info.file_size > 0x7FFFFFFF) as dst:
+                    shutil.copyfileobj(src, dst, buffer_size)
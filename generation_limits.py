@@ -0,0 +1,74 @@
+"""
+Per-request generation limits
+- Output-token cap and generation time limit scaled to the input size and the target language's expansion ratio
+- Repetition-loop detection on the token stream so a runaway generation is cut off early
+"""
+
+import math
+from collections import Counter, deque
+from typing import Deque, Optional, Tuple
+
+# Output tokens per estimated input token (ebook_parser.estimate_tokens), by target language;
+# model tokenizers spend more tokens on Hangul and kana than the estimate gives their source
+EXPANSION_RATIOS = {
+    "한국어": 2.0, "korean": 2.0,
+    "일본어": 1.8, "japanese": 1.8,
+    "중국어": 1.5, "chinese": 1.5,
+}
+DEFAULT_EXPANSION_RATIO = 1.5
+
+
+def expansion_ratio(target_language: str) -> float:
+    return EXPANSION_RATIOS.get(target_language.strip().lower(), DEFAULT_EXPANSION_RATIO)
+
+
+def output_token_limit(input_tokens: int, ratio: float, margin: float, minimum: int, maximum: int) -> int:
+    """num_predict for an input of this size"""
+    return min(maximum, max(minimum, math.ceil(input_tokens * ratio * margin)))
+
+
+def time_limit(output_tokens: int, seconds_per_token: float, minimum: float, maximum: float) -> float:
+    """Seconds the generation of output_tokens may take"""
+    return min(maximum, max(minimum, output_tokens * seconds_per_token))
+
+
+class RunawayGenerationError(RuntimeError):
+    """The model kept generating past its limits (repetition loop or time limit); worth retrying,
+    but says nothing about the server's health"""
+
+
+class RepetitionDetector:
+    """Flags a token stream stuck in a loop: one n-gram recurring max_repeats times within the last window n-grams
+
+    N-grams without any letter or digit (rules, ellipses, blank lines) are ignored.
+    """
+
+    def __init__(self, n: int = 4, window: int = 256, max_repeats: int = 8):
+        self.n = max(1, n)
+        self.window = window
+        self.max_repeats = max_repeats
+        self.repeated: Optional[str] = None  # The looping n-gram once detected
+        self._tokens: Deque[str] = deque(maxlen=self.n)
+        self._grams: Deque[Tuple[str, ...]] = deque()
+        self._counts: Counter = Counter()
+
+    def feed(self, token: str) -> bool:
+        """Add one streamed token; True once the stream is looping"""
+        self._tokens.append(token)
+        if len(self._tokens) < self.n:
+            return False
+        gram = tuple(self._tokens)
+        if not any(ch.isalnum() for part in gram for ch in part):
+            return False
+
+        self._grams.append(gram)
+        self._counts[gram] += 1
+        if len(self._grams) > self.window:
+            old = self._grams.popleft()
+            self._counts[old] -= 1
+            if not self._counts[old]:
+                del self._counts[old]
+        if self._counts[gram] >= self.max_repeats:
+            self.repeated = "".join(gram)
+            return True
+        return False
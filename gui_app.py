@@ -2,6 +2,7 @@ import sys
 import os
 import time
 import threading
+import multiprocessing
 import requests
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                             QLabel, QComboBox, QLineEdit, QPushButton, QFileDialog, 
@@ -11,7 +12,10 @@ from PySide6.QtCore import Qt, QThread, Signal, Slot, QSettings
 from PySide6.QtGui import QFont, QIcon, QAction
 
 from ebook_parser import EbookParser
-from async_translator import SyncTranslatorWrapper
+from parse_cache import ParseCache
+from async_translator import SyncTranslatorWrapper, OrderedTextWriter, TranslationConfig, PROMPT_TEMPLATE_VERSION
+from translation_journal import journal_path_for
+from endpoints import parse_endpoints
 from language import LanguageResources
 
 try:
@@ -26,8 +30,10 @@ class TranslationWorker(QThread):
     translation_done = Signal(dict)
     error_occurred = Signal(str)
     sample_updated = Signal(str, str)  # source text, translated text
+    tokens_updated = Signal(int, float)  # tokens generated so far, tokens per second
     
-    def __init__(self, file_path, model_name, source_lang, target_lang, server_url=None, ui_lang="ko", max_concurrent=5):
+    def __init__(self, file_path, model_name, source_lang, target_lang, server_url=None, ui_lang="ko", max_concurrent=5,
+                 resume=True, preview_path=None):
         super().__init__()
         self.file_path = file_path
         self.model_name = model_name
@@ -37,27 +43,57 @@ class TranslationWorker(QThread):
         self.stop_requested = False
         self.ui_lang = ui_lang
         self.max_concurrent = max_concurrent
+        self.resume = resume
+        self.preview_path = preview_path  # Text file filled in reading order while translating
         self.translator = None
         
     def run(self):
         try:
-            # Parse ebook
-            self.status_updated.emit(LanguageResources.get(self.ui_lang, "parsing_file"))
-            parser = EbookParser()
-            chapters = parser.parse_ebook(self.file_path)
-            self.status_updated.emit(f"{len(chapters)} {LanguageResources.get(self.ui_lang, 'chunks_parsed')}.")
+            # Several servers may be given as "url*weight, url*weight"; the weight defaults to the concurrency setting
+            endpoints = parse_endpoints(self.server_url or "", self.max_concurrent)
             
             # Initialize async translator with concurrency control
             self.translator = SyncTranslatorWrapper(
                 model_name=self.model_name,
                 target_language=self.target_lang,
                 source_language=self.source_lang,
-                base_url=self.server_url,
-                max_concurrent=self.max_concurrent
+                base_url=endpoints[0][0] if endpoints else None,
+                max_concurrent=self.max_concurrent,
+                endpoints=endpoints if len(endpoints) > 1 else None,
+                # Stay at most this many chunks ahead of the first unfinished one, so the preview grows steadily
+                reorder_window=256 if self.preview_path else 0
             )
+            # Load the model on the server(s) while the book is being parsed
+            self.translator.warm_up()
+            self.status_updated.emit(f"모델 불러오는 중: {self.model_name}")
             # Store original file path for EPUB saving
             self.translator.last_parsed_file = self.file_path
             
+            # Parse ebook as a stream so translation starts with the first chunk
+            self.status_updated.emit(LanguageResources.get(self.ui_lang, "parsing_file"))
+            parser = EbookParser(
+                workers=os.cpu_count(), html_backend='lxml-raw', structure='blocks', cache=ParseCache()
+            )
+            first_chunk = []
+            
+            # Checkpoint journal for this book + settings, so a crashed job can pick up where it stopped
+            journal_path = journal_path_for(
+                self.file_path,
+                f"{self.model_name}|{self.source_lang}|{self.target_lang}|"
+                f"{PROMPT_TEMPLATE_VERSION}|{parser.settings_fingerprint()}"
+            )
+            
+            def chunk_stream():
+                count = 0
+                for chunk in parser.iter_chunks(self.file_path):
+                    if not first_chunk:
+                        first_chunk.append(chunk)
+                    count += 1
+                    yield chunk
+                self.status_updated.emit(f"{count} {LanguageResources.get(self.ui_lang, 'chunks_parsed')}.")
+                if parser.pdf_cleanup_report:
+                    self.status_updated.emit(f"PDF: {parser.pdf_cleanup_report.report()}")
+            
             # Start translation with progress callback
             self.status_updated.emit(f"{self.model_name} (동시 {self.max_concurrent}개) {LanguageResources.get(self.ui_lang, 'translating_with')}")
             
@@ -69,25 +105,53 @@ class TranslationWorker(QThread):
                     self.translator.request_cancel()
                     return
                 self.progress_updated.emit(current, total)
-                self.status_updated.emit(f"{LanguageResources.get(self.ui_lang, 'translating_chunk')} {current}/{total}...")
+                self.status_updated.emit(
+                    f"{LanguageResources.get(self.ui_lang, 'translating_chunk')} {current}/{total or '?'}..."
+                )
                 
                 # Show first chunk as sample
                 if not first_sample_shown and current == 1:
                     first_sample_shown = True
-                    if chapters:
-                        self.sample_updated.emit(chapters[0][1][:500] + "...", "번역 중...")
+                    if first_chunk:
+                        self.sample_updated.emit(first_chunk[0][1][:500] + "...", "번역 중...")
+            
+            # Token-level progress from the streaming responses, throttled for the UI
+            started = time.monotonic()
+            last_token_emit = 0.0
+            
+            def token_callback(tokens):
+                nonlocal last_token_emit
+                now = time.monotonic()
+                if now - last_token_emit >= 0.25:
+                    last_token_emit = now
+                    self.tokens_updated.emit(tokens, tokens / max(now - started, 1e-6))
             
-            # Run parallel translation
-            translated_chapters = self.translator.translate_chapters(chapters, callback=progress_callback)
+            preview = OrderedTextWriter(self.preview_path) if self.preview_path else None
+            if preview:
+                self.status_updated.emit(f"번역된 앞부분부터 바로 기록: {self.preview_path}")
+            
+            # Run parallel translation while the parser is still extracting
+            try:
+                translated_chapters = self.translator.translate_chapters(
+                    chunk_stream(), callback=progress_callback, journal_path=journal_path, resume=self.resume,
+                    token_callback=token_callback, sink=preview
+                )
+            finally:
+                if preview:
+                    preview.close()
             
             if self.stop_requested:
                 self.status_updated.emit(LanguageResources.get(self.ui_lang, "translation_stopped"))
                 return
             
+            self.status_updated.emit(self.translator.last_stats.summary())
+            for line in self.translator.last_stats.endpoint_report:
+                self.status_updated.emit(line)
+            
             # Update sample with actual translation
-            if chapters and chapters[0][0] in translated_chapters:
-                first_translated = translated_chapters[chapters[0][0]]
-                self.sample_updated.emit(chapters[0][1][:500] + "...", first_translated[:500] + "...")
+            if first_chunk and first_chunk[0][0] in translated_chapters:
+                first_translated = translated_chapters[first_chunk[0][0]]
+                self.sample_updated.emit(first_chunk[0][1][:500] + "...", first_translated[:500] + "...")
             
             # Translation completed
             self.status_updated.emit(LanguageResources.get(self.ui_lang, "translation_completed"))
@@ -117,6 +181,7 @@ class EbookTranslatorApp(QMainWindow):
         self.init_ui()
         self.translation_worker = None
         self.translated_result = None
+        self.preview_path = None  # Reading-order preview of the current job, if enabled
         
         # Update UI when language setting changes
         self.update_ui_language(self.ui_language)
@@ -163,7 +228,9 @@ class EbookTranslatorApp(QMainWindow):
         
         # Ollama 서버에서 모델 목록 가져오기
         server_url = self.server_url.text() if hasattr(self, 'server_url') else "http://localhost:11434"
-        models = self.get_ollama_models(server_url)
+        # 서버가 여럿이면 첫 번째 서버의 모델 목록 사용
+        endpoints = parse_endpoints(server_url, 1)
+        models = self.get_ollama_models(endpoints[0][0] if endpoints else "http://localhost:11434")
         
         # 모델이 없으면 기본 모델 사용
         if not models:
@@ -202,6 +269,7 @@ class EbookTranslatorApp(QMainWindow):
         self.server_group = QGroupBox(LanguageResources.get(self.ui_language, "server_settings"))
         server_form = QFormLayout()
         self.server_url = QLineEdit("http://localhost:11434")
+        self.server_url.setToolTip("여러 서버는 쉼표로 구분하고 *숫자로 서버별 동시 요청 수 지정 (예: http://a:11434*4, http://b:11434*2)")
         self.server_url.editingFinished.connect(self.on_server_url_changed)
         server_form.addRow(LanguageResources.get(self.ui_language, "server_address"), self.server_url)
         self.server_group.setLayout(server_form)
@@ -232,13 +300,26 @@ class EbookTranslatorApp(QMainWindow):
         # 동시성 설정 (병렬 요청 수)
         concurrency_layout = QHBoxLayout()
         self.concurrency_spin = QSpinBox()
-        self.concurrency_spin.setRange(1, 20)
+        # The adaptive limiter never goes above max_concurrent_limit, so don't offer more
+        self.concurrency_spin.setRange(1, TranslationConfig.max_concurrent_limit)
         self.concurrency_spin.setValue(5)
-        self.concurrency_spin.setToolTip("동시에 처리할 번역 요청 수 (GPU 메모리에 따라 조절)")
+        self.concurrency_spin.setToolTip("동시에 처리할 번역 요청 수의 시작값 (실행 중 지연과 처리량을 보고 자동 조절)")
         concurrency_layout.addWidget(self.concurrency_spin)
         concurrency_layout.addWidget(QLabel("(권장: 3-8)"))
         model_form.addRow("동시 요청 수:", concurrency_layout)
         
+        # 중단된 작업 이어서 번역 (체크포인트 저널)
+        self.resume_check = QCheckBox("중단된 번역 이어서 하기")
+        self.resume_check.setChecked(True)
+        self.resume_check.setToolTip("같은 파일과 설정으로 중단된 작업이 있으면 완료된 부분은 다시 번역하지 않습니다")
+        model_form.addRow("", self.resume_check)
+        
+        # 번역 중 앞부분부터 읽을 수 있는 미리 읽기 파일 (저장하면 삭제)
+        self.preview_check = QCheckBox("번역 중 미리 읽기 파일 쓰기 (.partial.txt)")
+        self.preview_check.setChecked(False)
+        self.preview_check.setToolTip("번역된 앞부분부터 읽기 순서대로 파일에 기록합니다. 결과를 저장하면 삭제됩니다")
+        model_form.addRow("", self.preview_check)
+        
         self.model_group.setLayout(model_form)
         server_model_layout.addWidget(self.model_group)
         
@@ -439,11 +520,16 @@ class EbookTranslatorApp(QMainWindow):
         self.stop_btn.setEnabled(True)
         self.save_btn.setEnabled(False)
         self.progress_bar.setValue(0)
+        self.progress_bar.setRange(0, 0)  # Chunk count unknown until the book is parsed
         self.progress_label.setText(LanguageResources.get(self.ui_language, "loading"))
         
         # Initialize log
         self.log(LanguageResources.get(self.ui_language, "translation_started"))
         
+        self.preview_path = (
+            os.path.splitext(self.output_file_path.text())[0] + ".partial.txt" if self.preview_check.isChecked() else None
+        )
+        
         # Create and start translation worker thread
         self.translation_worker = TranslationWorker(
             self.input_file_path.text(),
@@ -452,7 +538,9 @@ class EbookTranslatorApp(QMainWindow):
             self.target_lang_combo.currentText(),
             self.server_url.text() if self.server_url.text() else None,
             self.ui_language,
-            self.concurrency_spin.value()  # 동시성 설정
+            self.concurrency_spin.value(),  # 동시성 설정
+            self.resume_check.isChecked(),
+            self.preview_path  # 진행 중 미리 읽기용
         )
         
         # Connect signals
@@ -461,6 +549,7 @@ class EbookTranslatorApp(QMainWindow):
         self.translation_worker.translation_done.connect(self.handle_translation_done)
         self.translation_worker.error_occurred.connect(self.handle_error)
         self.translation_worker.sample_updated.connect(self.update_sample)
+        self.translation_worker.tokens_updated.connect(self.update_tokens)
         
         # Start worker
         self.translation_worker.start()
@@ -486,6 +575,7 @@ class EbookTranslatorApp(QMainWindow):
             translator.last_parsed_file = self.input_file_path.text()
             translator.save_translation(self.translated_result, output_path)
             self.log(f"{LanguageResources.get(self.ui_language, 'saved_to')}: {output_path}")
+            self._remove_preview()
             QMessageBox.information(
                 self, 
                 LanguageResources.get(self.ui_language, "info"), 
@@ -499,13 +589,33 @@ class EbookTranslatorApp(QMainWindow):
                 f"{LanguageResources.get(self.ui_language, 'save_error_msg')}.\n{str(e)}"
             )
             
+    def _remove_preview(self):
+        """Delete the reading-order preview once the full result is saved"""
+        if self.preview_path and os.path.exists(self.preview_path):
+            try:
+                os.remove(self.preview_path)
+            except OSError as e:
+                self.log(f"미리 읽기 파일을 지울 수 없습니다: {e}")
+        self.preview_path = None
+            
     @Slot(int, int)
     def update_progress(self, current, total):
-        """Update progress status"""
+        """Update progress status (total is 0 while the book is still being parsed)"""
+        if not total:
+            # Busy indicator until parsing finishes and the chunk count is known
+            self.progress_bar.setRange(0, 0)
+            self.progress_label.setText(f"{LanguageResources.get(self.ui_language, 'translation_progress')} {current}/?")
+            return
+        self.progress_bar.setRange(0, 100)
         progress_percent = int((current / total) * 100)
         self.progress_bar.setValue(progress_percent)
         self.progress_label.setText(f"{LanguageResources.get(self.ui_language, 'translation_progress')} {current}/{total} ({progress_percent}%)")
         
+    @Slot(int, float)
+    def update_tokens(self, tokens, tokens_per_second):
+        """Show streamed token progress (status bar only, not logged)"""
+        self.statusBar().showMessage(f"생성 토큰 {tokens}개 ({tokens_per_second:.1f} 토큰/초)")
+        
     @Slot(str)
     def update_status(self, status):
         """Update status message"""
@@ -516,6 +626,7 @@ class EbookTranslatorApp(QMainWindow):
     def handle_translation_done(self, translated_chapters):
         """Handle translation completion"""
         self.translated_result = translated_chapters
+        self.progress_bar.setRange(0, 100)
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
         self.save_btn.setEnabled(True)
@@ -526,6 +637,7 @@ class EbookTranslatorApp(QMainWindow):
         """Handle errors"""
         self.log(f"{LanguageResources.get(self.ui_language, 'error')}: {error_msg}")
         self.statusBar().showMessage(f"{LanguageResources.get(self.ui_language, 'error_occurred')}: {error_msg}")
+        self.progress_bar.setRange(0, 100)
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
         QMessageBox.critical(self, LanguageResources.get(self.ui_language, "error"), error_msg)
@@ -654,6 +766,7 @@ class EbookTranslatorApp(QMainWindow):
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     translator_app = EbookTranslatorApp()
     translator_app.show()
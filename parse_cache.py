@@ -0,0 +1,148 @@
+"""
+On-disk cache of parsed chunk lists
+- Keyed by the file's content hash plus parser/chunker settings
+- Compact binary format (length-prefixed UTF-8, zlib-compressed)
+- Least-recently-used files are evicted once the cache exceeds its size limit
+"""
+
+import os
+import zlib
+import struct
+import hashlib
+import tempfile
+from typing import List, Tuple, Optional, Any
+
+from app_paths import user_cache_dir
+
+MAGIC = b"EBPC\x01"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+_SUFFIX = ".chunks"
+
+_ID_STR = 0
+_ID_INT = 1
+
+
+def file_digest(file_path, block_size=1024 * 1024) -> str:
+    """SHA-256 of the file contents, read in blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def encode_chunks(chunks: List[Tuple[Any, str]]) -> bytes:
+    """Serialize (chunk ID, text) pairs; IDs may be str (EPUB) or int (PDF page)"""
+    out = bytearray(struct.pack("<I", len(chunks)))
+    for chunk_id, text in chunks:
+        if isinstance(chunk_id, int):
+            out += struct.pack("<Bq", _ID_INT, chunk_id)
+        else:
+            encoded_id = str(chunk_id).encode("utf-8")
+            out += struct.pack("<BI", _ID_STR, len(encoded_id)) + encoded_id
+        encoded_text = text.encode("utf-8")
+        out += struct.pack("<I", len(encoded_text)) + encoded_text
+    return MAGIC + zlib.compress(bytes(out), 6)
+
+
+def decode_chunks(data: bytes) -> List[Tuple[Any, str]]:
+    """Inverse of encode_chunks; ValueError on foreign or corrupt data"""
+    if not data.startswith(MAGIC):
+        raise ValueError("not a parse cache file")
+    try:
+        payload = zlib.decompress(data[len(MAGIC):])
+        (count,), offset = struct.unpack_from("<I", payload), 4
+        chunks = []
+        for _ in range(count):
+            (kind,) = struct.unpack_from("<B", payload, offset)
+            offset += 1
+            if kind == _ID_INT:
+                (chunk_id,) = struct.unpack_from("<q", payload, offset)
+                offset += 8
+            else:
+                (length,) = struct.unpack_from("<I", payload, offset)
+                offset += 4
+                chunk_id = payload[offset:offset + length].decode("utf-8")
+                offset += length
+            (length,) = struct.unpack_from("<I", payload, offset)
+            offset += 4
+            chunks.append((chunk_id, payload[offset:offset + length].decode("utf-8")))
+            offset += length
+        return chunks
+    except (zlib.error, struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"corrupt parse cache file: {e}")
+
+
+class ParseCache:
+    """Content-addressed store of parse results"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or user_cache_dir("parse")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    def key_for(self, file_path, settings: str) -> str:
+        """Cache key: content hash of the book plus a fingerprint of the parse settings"""
+        settings_hash = hashlib.sha256(settings.encode("utf-8")).hexdigest()[:16]
+        return f"{file_digest(file_path)}-{settings_hash}"
+
+    def _path(self, key) -> str:
+        return os.path.join(self.cache_dir, key + _SUFFIX)
+
+    def get(self, key) -> Optional[List[Tuple[Any, str]]]:
+        """Cached chunks, or None on a miss"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                chunks = decode_chunks(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"파싱 캐시 손상, 무시합니다: {e}")
+            self._remove(path)
+            return None
+
+        # Touch on read so eviction is least-recently-used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return chunks
+
+    def put(self, key, chunks: List[Tuple[Any, str]]):
+        """Store chunks atomically, then evict old entries over the size limit"""
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(encode_chunks(chunks))
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"파싱 캐시 저장 실패: {e}")
+            return
+        self._evict()
+
+    def _evict(self):
+        """Delete least-recently-used entries until the cache fits in max_bytes"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(_SUFFIX):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
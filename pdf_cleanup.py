@@ -0,0 +1,148 @@
+"""
+PDF page clean-up before chunking
+- Drops running headers/footers: edge lines repeated at the same position on nearby pages
+- Drops bare page numbers (roman numerals only in footers)
+- Stitches sentences that continue across a page break
+"""
+
+import re
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Tuple
+
+# (text, top) of each line, top measured in PDF points from the top of the page
+PageLines = Tuple[int, float, List[Tuple[str, float]]]  # (page number, page height, lines)
+
+_DIGITS_RE = re.compile(r'\d+')
+_SPACES_RE = re.compile(r'\s+')
+_ROMAN = r'(?=[ivxlcdm])m{0,4}(cm|cd|d?c{0,3})(xc|xl|l?x{0,3})(ix|iv|v?i{0,3})'
+_PAGE_NUMBER_RE = re.compile(r'^[-–—\s]*(page\s+)?#(\s*(/|of)\s*#)?[-–—\s]*$')
+_ROMAN_PAGE_NUMBER_RE = re.compile(r'^[-–—\s]*(page\s+)?' + _ROMAN + r'[-–—\s]*$')
+_SENTENCE_END_RE = re.compile(r'[.!?…。！？]["\'”’)\]」』]*(?=\s)')
+_TERMINALS = tuple('.!?…。！？"\'”’)]」』:')
+
+
+def extract_page_lines(page) -> Tuple[float, List[Tuple[str, float]]]:
+    """(page height, [(line text, top)]) for a pdfplumber page"""
+    lines = page.extract_text_lines(return_chars=False)
+    return page.height, [(line['text'], line['top']) for line in lines if line['text'].strip()]
+
+
+def _normalize(text) -> str:
+    """Page-independent form of a line: digits collapsed so 'Page 12' matches 'Page 13'"""
+    return _SPACES_RE.sub(' ', _DIGITS_RE.sub('#', text.strip().lower()))
+
+
+def _is_page_number(text, signature) -> bool:
+    """Bare page number line; roman numerals only in the footer, where front matter puts them,
+    since a lone 'IV' at the top is more likely a chapter heading"""
+    edge, _, normalized = signature
+    if _PAGE_NUMBER_RE.match(normalized):
+        return True
+    if edge != 'bottom' or not _ROMAN_PAGE_NUMBER_RE.match(normalized):
+        return False
+    # 'iv' or 'IV', not words that happen to be numerals ('Mix', 'Li')
+    numeral = text.strip(' -–—').split()[-1]
+    return numeral.islower() or numeral.isupper()
+
+
+class RunningLineStripper:
+    """Removes lines repeated at the same page position within a sliding window of pages
+
+    Decisions for page i look at pages i-window .. i+window, so running heads
+    that change per chapter or alternate between odd and even pages are still
+    caught, and pages stream out with a lag of only `window` pages.
+    """
+
+    def __init__(self, window=6, edge_lines=3, min_repeats=2, position_tolerance=6.0,
+                 token_estimator: Callable[[str], int] = len):
+        self.window = window
+        self.edge_lines = edge_lines  # Lines from the top and bottom that may be headers/footers
+        self.min_repeats = min_repeats  # Other pages in the window that must repeat the line
+        self.position_tolerance = position_tolerance  # Points
+        self.token_estimator = token_estimator
+        self.pages = 0
+        self.removed_lines = 0
+        self.tokens_saved = 0
+
+    def _edge_signatures(self, height, lines) -> Dict[int, Tuple[str, int, str]]:
+        """Line index -> (edge, position bucket, normalized text) for the top/bottom lines"""
+        signatures = {}
+        bucket = self.position_tolerance
+        for index, (text, top) in enumerate(lines):
+            if index < self.edge_lines:
+                signatures[index] = ('top', int(top // bucket), _normalize(text))
+            elif index >= len(lines) - self.edge_lines:
+                signatures[index] = ('bottom', int((height - top) // bucket), _normalize(text))
+        return signatures
+
+    def _is_repeated(self, signature, others) -> bool:
+        edge, position, text = signature
+        candidates = {(edge, position + offset, text) for offset in (-1, 0, 1)}
+        repeats = sum(1 for page_signatures in others if candidates & page_signatures)
+        return repeats >= self.min_repeats
+
+    def _clean(self, buffer, position) -> Tuple[int, str]:
+        page_number, lines, signatures = buffer[position]
+        others = [set(entry[2].values()) for i, entry in enumerate(buffer) if i != position]
+
+        kept = []
+        for index, (text, _) in enumerate(lines):
+            signature = signatures.get(index)
+            if signature and (_is_page_number(text, signature) or self._is_repeated(signature, others)):
+                self.removed_lines += 1
+                self.tokens_saved += self.token_estimator(text)
+                continue
+            kept.append(text)
+
+        self.pages += 1
+        return page_number, "\n".join(kept)
+
+    def strip(self, pages: Iterable[PageLines]) -> Iterator[Tuple[int, str]]:
+        """Yield (page number, cleaned text) in page order"""
+        buffer: Deque = deque()
+        position = 0  # Index in buffer of the next page to emit
+
+        for page_number, height, lines in pages:
+            buffer.append((page_number, lines, self._edge_signatures(height, lines)))
+            while len(buffer) - 1 - position >= self.window:
+                yield self._clean(buffer, position)
+                position += 1
+                if position > self.window:
+                    buffer.popleft()
+                    position -= 1
+
+        while position < len(buffer):
+            yield self._clean(buffer, position)
+            position += 1
+
+    def report(self) -> str:
+        return (f"{self.pages} pages: removed {self.removed_lines} header/footer/page-number lines "
+                f"(~{self.tokens_saved} tokens saved)")
+
+
+def stitch_pages(pages: Iterable[Tuple[int, str]]) -> Iterator[Tuple[int, str]]:
+    """Move a sentence cut off at the end of a page to the start of the next page"""
+    carry = ""
+    last_page = None
+
+    for page_number, text in pages:
+        last_page = page_number
+        text = text.strip()
+        if carry:
+            if carry.endswith('-') and text[:1].islower():
+                text = carry[:-1] + text  # Word hyphenated across the break
+            else:
+                text = f"{carry} {text}".strip()
+            carry = ""
+
+        if text and not text.endswith(_TERMINALS):
+            ends = list(_SENTENCE_END_RE.finditer(text))
+            if ends:
+                cut = ends[-1].end()
+                text, carry = text[:cut], text[cut:].strip()
+
+        if text:
+            yield page_number, text
+
+    if carry:
+        yield last_page, carry
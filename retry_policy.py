@@ -0,0 +1,75 @@
+"""
+Retry policy for LLM requests
+- Errors are classified by cause; client errors (4xx such as an unknown model) are never retried
+- Exponential backoff with full jitter so concurrent workers don't retry in lockstep
+- A per-job retry budget so an outage fails fast instead of every chunk using all of its retries
+"""
+
+import random
+
+import httpx
+
+from generation_limits import RunawayGenerationError
+
+TIMEOUT = "timeout"
+CONNECTION = "connection"
+SERVER = "server"  # 5xx, 408, 429
+CLIENT = "client"  # Other 4xx: the request itself is wrong
+GENERATION = "generation"  # The model looped or ran past its limits
+OTHER = "other"  # Malformed or error responses from the server
+
+_RETRYABLE_STATUS = {408, 429}
+
+
+def classify_error(error: BaseException) -> str:
+    """Cause of a failed request"""
+    if isinstance(error, RunawayGenerationError):
+        return GENERATION
+    if isinstance(error, httpx.TimeoutException):
+        return TIMEOUT
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return CLIENT if 400 <= status < 500 and status not in _RETRYABLE_STATUS else SERVER
+    if isinstance(error, (httpx.NetworkError, httpx.RemoteProtocolError)):
+        return CONNECTION
+    return OTHER
+
+
+def is_retryable(cause: str) -> bool:
+    return cause != CLIENT
+
+
+def counts_against_server(cause: str) -> bool:
+    """Whether a failure of this cause says the server is unhealthy"""
+    return cause not in (CLIENT, GENERATION)
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 10.0) -> float:
+    """Seconds to sleep before retry number attempt + 1 (0-based attempt)"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class RetryBudget:
+    """Retries allowed for one job: minimum plus ratio of the requests sent so far"""
+
+    def __init__(self, ratio: float = 0.1, minimum: int = 10):
+        self.ratio = ratio
+        self.minimum = minimum
+        self.requests = 0
+        self.retries = 0
+        self.exhausted = False
+
+    def record_request(self):
+        self.requests += 1
+
+    def try_retry(self) -> bool:
+        """Take one retry from the budget"""
+        if self.retries >= self.minimum + self.requests * self.ratio:
+            if not self.exhausted:
+                # Reported once; retries resume as more requests succeed and the budget grows
+                print(f"재시도 예산 소진: 요청 {self.requests}개에 재시도 {self.retries}개, "
+                      f"예산이 다시 늘어날 때까지 실패한 요청은 재시도하지 않습니다")
+                self.exhausted = True
+            return False
+        self.retries += 1
+        return True
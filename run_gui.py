@@ -7,11 +7,15 @@ Ebook Translator GUI Execution Script
 
 import sys
 import os
+import multiprocessing
 from PySide6.QtWidgets import QApplication
 from PySide6.QtCore import QTranslator, QLocale, QLibraryInfo
 from gui_app import EbookTranslatorApp
 
 if __name__ == "__main__":
+    # Required for the parser's worker processes in the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
+    
     app = QApplication(sys.argv)
     app.setStyle('Fusion')  # Apply consistent UI style
     
@@ -0,0 +1,107 @@
+"""
+Sentence segmentation for the chunker
+- Punkt model is loaded lazily, once per process, and never downloaded at import
+- Rule-based segmenter for CJK text and as an offline fallback
+"""
+
+import re
+from typing import Dict, List
+
+# 'auto': rule-based for CJK text, Punkt otherwise (rule-based if Punkt data is missing)
+SEGMENTERS = ('auto', 'punkt', 'regex')
+
+# Hangul, kana and CJK ideographs
+CJK_CHAR_RE = re.compile('[\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]')
+
+# Latin terminators need trailing whitespace; CJK full-width terminators don't
+_BOUNDARY_RE = re.compile(
+    r'[.!?…]+["\'”’)\]]*(?=\s)'
+    r'|[。！？｡]+[」』”’）)\]]*'
+)
+_LAST_WORD_RE = re.compile(r'(\w+)\.$')
+_ABBREVIATIONS = frozenset({
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'mt', 'vs', 'etc', 'no', 'vol',
+    'fig', 'pp', 'ch', 'ed', 'eg', 'ie', 'cf', 'al', 'approx', 'dept', 'inc', 'ltd', 'co',
+})
+
+# Per-process Punkt cache (None = data not installed); process pools warm it via preload()
+_punkt_cache: Dict[str, object] = {}
+
+
+def get_punkt_tokenizer(language='english'):
+    """Return the cached Punkt model, loading it on first use; LookupError if nltk or the data is not installed"""
+    if language not in _punkt_cache:
+        try:
+            import nltk.data  # heavy import, only paid when Punkt is actually used
+            _punkt_cache[language] = nltk.data.load(f'tokenizers/punkt/{language}.pickle')
+        except (ImportError, LookupError):
+            _punkt_cache[language] = None
+
+    tokenizer = _punkt_cache[language]
+    if tokenizer is None:
+        raise LookupError(f"NLTK punkt model for '{language}' is not available (nltk or its data not installed)")
+    return tokenizer
+
+
+def punkt_available(language='english') -> bool:
+    """Whether the Punkt model can be loaded without touching the network"""
+    try:
+        get_punkt_tokenizer(language)
+        return True
+    except LookupError:
+        return False
+
+
+def regex_split_sentences(text) -> List[str]:
+    """Rule-based splitter: terminal punctuation, with common abbreviations and initials guarded"""
+    sentences = []
+    start = 0
+
+    for match in _BOUNDARY_RE.finditer(text):
+        end = match.end()
+        if text[match.start()] == '.':
+            # "Dr. Smith", "J. R. R. Tolkien", "e.g. this" are not sentence ends
+            word = _LAST_WORD_RE.search(text, start, match.start() + 1)
+            if word and (len(word.group(1)) == 1 or word.group(1).lower() in _ABBREVIATIONS):
+                continue
+            following = text[end:end + 2].lstrip()
+            if following[:1].islower():
+                continue
+
+        sentence = text[start:end].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = end
+
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+def is_cjk_text(text, threshold=0.3) -> bool:
+    """Whether CJK characters make up a significant share of the non-space text"""
+    if not CJK_CHAR_RE.search(text):
+        return False
+    letters = len(text) - text.count(' ') - text.count('\n')
+    return letters > 0 and len(CJK_CHAR_RE.findall(text)) / letters >= threshold
+
+
+def split_sentences(text, segmenter='auto', language='english') -> List[str]:
+    """Split text into sentences with the selected segmenter"""
+    if segmenter == 'regex':
+        return regex_split_sentences(text)
+    if segmenter == 'punkt':
+        return get_punkt_tokenizer(language).tokenize(text)
+    if segmenter != 'auto':
+        raise ValueError(f"Unsupported segmenter: {segmenter}")
+
+    if is_cjk_text(text) or not punkt_available(language):
+        return regex_split_sentences(text)
+    return get_punkt_tokenizer(language).tokenize(text)
+
+
+def preload(segmenter='auto', language='english'):
+    """Process-pool initializer: load the Punkt model once per worker, not once per task"""
+    if segmenter in ('auto', 'punkt'):
+        punkt_available(language)
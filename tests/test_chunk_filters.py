@@ -0,0 +1,64 @@
+import unittest
+
+from chunk_filters import is_code, is_dot_leader_list, is_isbn, is_number, is_url, passthrough_rule
+
+
+class PassthroughRuleTest(unittest.TestCase):
+    def test_prose_is_translated(self):
+        for text in (
+            "She ran home; he followed; they argued; it rained.",
+            "The function f(x) returns g(y); see h(z).",
+            "In C you write if (a == b) { ... } to compare two values.",
+            "The meeting ran from 9 to 5; lunch was at noon.",
+            "Chapter 1",
+        ):
+            with self.subTest(text=text):
+                self.assertIsNone(passthrough_rule(text))
+
+    def test_separators_and_numbers(self):
+        self.assertEqual(passthrough_rule("* * *"), "punctuation")
+        self.assertEqual(passthrough_rule("  42  "), "number")
+        self.assertTrue(is_number("12.5%"))
+        self.assertFalse(is_number("---"))
+
+    def test_urls(self):
+        self.assertTrue(is_url("https://example.org/a www.example.com me@example.com"))
+        self.assertFalse(is_url("See https://example.org for details"))
+
+    def test_isbn(self):
+        self.assertTrue(is_isbn("ISBN 978-3-16-148410-0"))
+        self.assertTrue(is_isbn("0-306-40615-2"))
+        self.assertFalse(is_isbn("12345"))
+
+    def test_rules_are_selectable(self):
+        self.assertIsNone(passthrough_rule("42", rules=["url"]))
+
+
+class CodeTest(unittest.TestCase):
+    def test_listings(self):
+        for text in (
+            "def area(r):\n    return 3.14 * r * r",
+            "int main() { printf(\"hi\"); return 0; }",
+            "const total = items.reduce(sum, 0);\nconsole.log(total);",
+        ):
+            with self.subTest(text=text):
+                self.assertTrue(is_code(text))
+
+    def test_semicolons_alone_are_not_code(self):
+        self.assertFalse(is_code("She ran home; he followed; they argued; it rained."))
+
+    def test_calls_in_prose_are_not_code(self):
+        self.assertFalse(is_code("The function f(x) returns g(y); see h(z)."))
+        self.assertFalse(is_code("Call open(path) first, then read(n) and close()."))
+
+
+class DotLeaderTest(unittest.TestCase):
+    def test_table_of_contents(self):
+        self.assertTrue(is_dot_leader_list("Harbour ........ 45 Lighthouse ........ 52"))
+
+    def test_ellipsis_in_prose(self):
+        self.assertFalse(is_dot_leader_list("He waited.... and waited.... until 1999 came."))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import re
+import unittest
+
+from ebook_parser import apply_block_translations, block_plain_text, extract_blocks
+
+
+def shout(text):
+    """Stand-in translation: upper-cases words and leaves the markers alone"""
+    return re.sub(r'[a-z]+', lambda match: match.group().upper(), text)
+
+
+def round_trip(html, translate=shout):
+    return apply_block_translations(html, {path: translate(text) for path, text in extract_blocks(html)})
+
+
+class BlockRoundTripTest(unittest.TestCase):
+    def test_nav_document_keeps_its_links(self):
+        nav = ('<html><body><nav epub:type="toc"><h2>Contents</h2><ol>'
+               '<li><a href="c0.xhtml">C0</a></li><li><a href="c1.xhtml">C1</a></li></ol></nav></body></html>')
+        self.assertEqual(extract_blocks(nav), [])
+        self.assertEqual(round_trip(nav), nav)
+
+    def test_link_emphasis_and_line_break_survive(self):
+        html = '<body><p>roses are <em>red</em><br/>violets are <a href="notes.xhtml#n1">blue</a></p></body>'
+        [(path, text)] = extract_blocks(html)
+        self.assertEqual(text, 'roses are <1>red</1><2/>violets are <3>blue</3>')
+        self.assertEqual(block_plain_text(text), 'roses are red\nviolets are blue')
+        self.assertEqual(
+            round_trip(html),
+            '<body><p>ROSES ARE <em>RED</em><br/>VIOLETS ARE <a href="notes.xhtml#n1">BLUE</a></p></body>'
+        )
+
+    def test_markers_can_move_with_the_word_order(self):
+        html = '<p>a <em>red</em> rose</p>'
+        self.assertEqual(round_trip(html, lambda text: 'rose, <1>rouge</1>'), '<p>rose, <em>rouge</em></p>')
+
+    def test_mangled_markers_fall_back_to_plain_text(self):
+        html = '<p>a <em>red</em> rose</p>'
+        self.assertEqual(round_trip(html, lambda text: 'une <1>rose</2> rouge'), '<p>une rose rouge</p>')
+
+    def test_code_listing_is_left_alone(self):
+        html = '<body><p>Listing:</p><pre>int x;\n    f(x);</pre></body>'
+        self.assertEqual([text for _, text in extract_blocks(html)], ['Listing:'])
+        self.assertIn('<pre>int x;\n    f(x);</pre>', round_trip(html))
+
+    def test_mixed_content_keeps_nested_blocks(self):
+        html = '<ul><li>Item <b>intro</b><ul><li>sub</li></ul></li></ul>'
+        self.assertEqual([text for _, text in extract_blocks(html)], ['Item <1>intro</1>', 'sub'])
+        self.assertEqual(round_trip(html), '<ul><li>ITEM <b>INTRO</b><ul><li>SUB</li></ul></li></ul>')
+
+
+if __name__ == "__main__":
+    unittest.main()
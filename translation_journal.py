@@ -0,0 +1,114 @@
+"""
+Crash-safe checkpoint journal for long translation jobs
+- Append-only JSON lines, one per completed chunk
+- Flushed to the OS on every record; fsync is batched by count and time
+- A torn last line (crash mid-write) is ignored on reload
+"""
+
+import os
+import json
+import time
+import hashlib
+from typing import Any, Dict, Tuple
+
+from app_paths import user_cache_dir
+from parse_cache import file_digest
+
+JOURNAL_VERSION = 1
+DEFAULT_FSYNC_EVERY = 32
+DEFAULT_FSYNC_INTERVAL = 2.0  # Seconds
+
+# index -> (chunk ID, source key, translation)
+JournalEntries = Dict[int, Tuple[Any, bytes, str]]
+
+
+def journal_path_for(file_path, settings: str) -> str:
+    """Journal location for one book translated with the given settings (model, languages, parser)"""
+    material = f"{file_digest(file_path)}\x1f{settings}"
+    key = hashlib.sha256(material.encode("utf-8")).hexdigest()[:32]
+    return os.path.join(user_cache_dir("journal"), key + ".jsonl")
+
+
+class TranslationJournal:
+    """Completed chunks of one job, keyed by their position in the chunk stream"""
+
+    def __init__(self, path, fsync_every=DEFAULT_FSYNC_EVERY, fsync_interval=DEFAULT_FSYNC_INTERVAL):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def load(self) -> JournalEntries:
+        """Entries written by an earlier run; empty if there is no usable journal"""
+        entries: JournalEntries = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                header = json.loads(f.readline() or "{}")
+                if header.get("version") != JOURNAL_VERSION:
+                    return {}
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        entries[record["i"]] = (record["c"], bytes.fromhex(record["k"]), record["t"])
+                    except (ValueError, KeyError, TypeError):
+                        break  # Torn write at the crash point; nothing after it is trustworthy
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"번역 저널을 읽을 수 없어 새로 시작합니다: {e}")
+            return {}
+        return entries
+
+    def open(self, resume=True) -> JournalEntries:
+        """Start writing; with resume, keep and return what an earlier run completed"""
+        entries = self.load() if resume else {}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        # Rewrite only the valid prefix so a torn tail never sits between old and new records
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"version": JOURNAL_VERSION}) + "\n")
+            for index, (chunk_id, key, text) in sorted(entries.items()):
+                f.write(self._record(index, chunk_id, key, text))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._last_sync = time.monotonic()
+        return entries
+
+    @staticmethod
+    def _record(index, chunk_id, key: bytes, text: str) -> str:
+        return json.dumps({"i": index, "c": chunk_id, "k": key.hex(), "t": text}, ensure_ascii=False) + "\n"
+
+    def append(self, index: int, chunk_id, key: bytes, text: str):
+        """Record one completed chunk"""
+        self._file.write(self._record(index, chunk_id, key, text))
+        # Survives a process crash immediately; survives power loss once synced
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        if self._file and self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def close(self):
+        if self._file:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """Close and delete the journal once the job has finished"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
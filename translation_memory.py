@@ -0,0 +1,120 @@
+"""
+Persistent translation memory (SQLite)
+- Keyed by a hash of (model, source language, target language, prompt template version, normalized text)
+- Values optionally zlib-compressed
+- Age- and size-based eviction, hit/miss statistics
+"""
+
+import os
+import time
+import zlib
+import sqlite3
+import hashlib
+from dataclasses import dataclass
+from typing import Optional
+
+from app_paths import user_cache_dir
+
+DEFAULT_MAX_ENTRIES = 500_000
+DEFAULT_MAX_AGE_DAYS = 365
+# Short values don't shrink under zlib
+_COMPRESS_MIN_BYTES = 64
+# Commit in batches; a crash loses at most this many entries, never corrupts the store
+_COMMIT_EVERY = 64
+
+
+@dataclass
+class MemoryStats:
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class TranslationMemory:
+    """Local store of previous translations"""
+
+    def __init__(self, path: Optional[str] = None, compress: bool = True,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, max_age_days: float = DEFAULT_MAX_AGE_DAYS):
+        self.path = path or os.path.join(user_cache_dir("tm"), "translation_memory.sqlite3")
+        self.compress = compress
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.stats = MemoryStats()
+        self._pending_writes = 0
+
+        # Accessed only from the translator's event-loop thread
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS memory ("
+            " key BLOB PRIMARY KEY, value BLOB NOT NULL, compressed INTEGER NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS memory_accessed ON memory (accessed)")
+        self.evict()
+
+    @staticmethod
+    def make_key(model: str, source_language: Optional[str], target_language: str,
+                 template_version: str, text: str) -> bytes:
+        """Hash of everything that determines the translation"""
+        normalized = " ".join(text.split())
+        material = "\x1f".join((model, source_language or "", target_language, str(template_version), normalized))
+        return hashlib.sha256(material.encode("utf-8")).digest()
+
+    def get(self, key: bytes) -> Optional[str]:
+        row = self._db.execute("SELECT value, compressed FROM memory WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        self._db.execute("UPDATE memory SET accessed = ? WHERE key = ?", (time.time(), key))
+        self._count_write()
+        value, compressed = row
+        return (zlib.decompress(value) if compressed else value).decode("utf-8")
+
+    def put(self, key: bytes, value: str):
+        data = value.encode("utf-8")
+        compressed = self.compress and len(data) >= _COMPRESS_MIN_BYTES
+        if compressed:
+            data = zlib.compress(data, 6)
+        now = time.time()
+        self._db.execute(
+            "INSERT OR REPLACE INTO memory (key, value, compressed, created, accessed) VALUES (?, ?, ?, ?, ?)",
+            (key, data, int(compressed), now, now)
+        )
+        self.stats.writes += 1
+        self._count_write()
+
+    def _count_write(self):
+        self._pending_writes += 1
+        if self._pending_writes >= _COMMIT_EVERY:
+            self.flush()
+
+    def flush(self):
+        """Commit pending writes"""
+        if self._pending_writes:
+            self._db.commit()
+            self._pending_writes = 0
+
+    def evict(self):
+        """Drop entries older than max_age_days, then least-recently-used ones beyond max_entries"""
+        cutoff = time.time() - self.max_age_days * 86400
+        self._db.execute("DELETE FROM memory WHERE created < ?", (cutoff,))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM memory").fetchone()
+        if count > self.max_entries:
+            self._db.execute(
+                "DELETE FROM memory WHERE key IN (SELECT key FROM memory ORDER BY accessed LIMIT ?)",
+                (count - self.max_entries,)
+            )
+        self._db.commit()
+
+    def close(self):
+        self.flush()
+        self._db.close()